@@ -0,0 +1,37 @@
+import datetime
+import re
+
+import bcrypt
+
+# Este módulo no importa la base de datos: lo usan también los procesos
+# que calculan hashes en paralelo durante la importación masiva.
+
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+
+def validate_email(email):
+    """Validar formato de email"""
+    return re.match(EMAIL_PATTERN, email) is not None
+
+def validate_password(password):
+    """Validar que la contraseña tenga al menos 6 caracteres"""
+    return len(password) >= 6
+
+def validate_birth_date(birth_date):
+    """Validar fecha de nacimiento (AAAA-MM-DD); devuelve un mensaje de error o None"""
+    try:
+        birth_date_obj = datetime.datetime.strptime(birth_date, '%Y-%m-%d')
+    except ValueError:
+        return 'Formato de fecha inválido'
+
+    if birth_date_obj > datetime.datetime.now():
+        return 'La fecha de nacimiento no puede ser futura'
+
+    age = datetime.datetime.now().year - birth_date_obj.year
+    if age < 13:
+        return 'Debes tener al menos 13 años para registrarte'
+
+    return None
+
+def hash_password(password):
+    """Hash bcrypt de una contraseña"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
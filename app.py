@@ -1,32 +1,153 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import (
+    Flask, Response, render_template, request, redirect, url_for, session, flash, jsonify,
+    send_from_directory, stream_with_context
+)
 from database import (
     init_db, register_user, authenticate_user, get_user_by_id, 
     get_user_tasks, get_user_categories, add_task, update_task_status,
-    add_category, get_task_statistics, delete_task, update_task, delete_category
+    add_category, get_task_statistics, delete_task, update_task, delete_category,
+    get_completion_timeseries, begin_causal_session, end_causal_session,
+    iter_task_list, get_task_description, release_causal_session,
+    create_provisioning_job, get_provisioning_job
+)
+from recurrence import parse_recurrence
+from accounts import validate_email, validate_password, validate_birth_date
+from provisioning import IMPORTS_DIR, detect_format, run_provisioning_job
+from bson.objectid import ObjectId
+from assets import (
+    ASSETS_BUILD_DIR, COMPRESSED_VARIANTS, RESPONSE_COMPRESSION, compress, load_asset_manifest,
+    stream_compressor
 )
 import datetime
-import re
+import itertools
+import json
+import mimetypes
+import os
+import threading
 
 app = Flask(__name__)
 app.secret_key = 'tu_clave_secreta_aqui_cambiar_en_produccion'  # Cambiar en producción
 
-# Inicializar base de datos
-init_db()
+# Usuarios con permisos de administración (separados por comas)
+ADMIN_USERNAMES = {name.strip() for name in os.getenv('TASKFLOW_ADMIN_USERS', '').split(',') if name.strip()}
+
+# Bundles CSS/JS versionados por contenido (ver assets.py).
+# Se cargan con la primera página y no al importar el módulo: los procesos que
+# calculan hashes en la importación masiva vuelven a importar este archivo.
+asset_manifest = None
+asset_manifest_lock = threading.Lock()
+
+# Tamaño mínimo para comprimir respuestas dinámicas
+MIN_COMPRESS_SIZE = 500
+
+# Listados con más tareas que esto se envían en streaming
+TASK_LIST_STREAM_THRESHOLD = 200
+STREAM_CHUNK_SIZE = 64 * 1024
 
-def validate_email(email):
-    """Validar formato de email"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+# orjson es opcional: si no está instalado se usa el módulo json estándar
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def validate_password(password):
-    """Validar que la contraseña tenga al menos 6 caracteres"""
-    return len(password) >= 6
+def dumps_json(data):
+    """Serializar a JSON en bytes, con orjson si está disponible"""
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
 
 @app.route('/favicon.ico')
 def favicon():
     """Ruta para evitar errores 404 del favicon"""
     return '', 204  # Respuesta vacía sin error
 
+@app.before_request
+def open_causal_session():
+    """Continuar la sesión causal del usuario para que vea sus propias escrituras"""
+    # Los bundles no leen la sesión: así no reciben "Vary: Cookie" y se cachean para todos
+    if request.endpoint == 'asset':
+        return
+    begin_causal_session(session.get('causal_token'))
+
+@app.after_request
+def save_causal_session(response):
+    """Guardar en la sesión del usuario hasta qué escritura ha visto"""
+    if request.endpoint == 'asset':
+        return response
+    # El token solo cambia en peticiones que escribieron algo
+    token = end_causal_session()
+    if 'user_id' in session and token and token != session.get('causal_token'):
+        session['causal_token'] = token
+    return response
+
+@app.teardown_request
+def close_causal_session(exc):
+    """Cerrar la sesión de MongoDB aunque la petición haya fallado"""
+    end_causal_session()
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    """Servir bundles estáticos con caché inmutable y variantes precomprimidas"""
+    mimetype = mimetypes.guess_type(filename)[0]
+    response = None
+    
+    for encoding, suffix in COMPRESSED_VARIANTS:
+        if request.accept_encodings[encoding] and os.path.exists(os.path.join(ASSETS_BUILD_DIR, filename + suffix)):
+            response = send_from_directory(ASSETS_BUILD_DIR, filename + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    
+    if response is None:
+        response = send_from_directory(ASSETS_BUILD_DIR, filename, mimetype=mimetype)
+    
+    # El nombre incluye el hash del contenido, así que nunca cambia
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def get_asset_manifest():
+    """Manifiesto de bundles, cargado (o compilado) una sola vez por proceso"""
+    global asset_manifest
+    with asset_manifest_lock:
+        if asset_manifest is None:
+            asset_manifest = load_asset_manifest()
+        return asset_manifest
+
+@app.context_processor
+def inject_asset_url():
+    """Exponer asset_url() a las plantillas para resolver bundles versionados"""
+    def asset_url(name):
+        return url_for('asset', filename=get_asset_manifest()[name])
+    return {'asset_url': asset_url}
+
+def preferred_encoding():
+    """Codificación de compresión preferida que acepta el cliente, o None"""
+    for encoding, _ in COMPRESSED_VARIANTS:
+        if request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+@app.after_request
+def compress_response(response):
+    """Comprimir las respuestas HTML y JSON según Accept-Encoding"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in ['text/html', 'application/json']):
+        return response
+    
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+    
+    encoding = preferred_encoding()
+    if encoding:
+        response.set_data(compress(data, encoding, RESPONSE_COMPRESSION))
+        response.headers['Content-Encoding'] = encoding
+    
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app.route('/')
 def index():
     if 'user_id' not in session:
@@ -94,18 +215,9 @@ def register():
         
         # Validar fecha de nacimiento si se proporciona
         if birth_date:
-            try:
-                birth_date_obj = datetime.datetime.strptime(birth_date, '%Y-%m-%d')
-                if birth_date_obj > datetime.datetime.now():
-                    flash('La fecha de nacimiento no puede ser futura', 'danger')
-                    return render_template('register.html')
-                
-                age = datetime.datetime.now().year - birth_date_obj.year
-                if age < 13:
-                    flash('Debes tener al menos 13 años para registrarte', 'danger')
-                    return render_template('register.html')
-            except ValueError:
-                flash('Formato de fecha inválido', 'danger')
+            error = validate_birth_date(birth_date)
+            if error:
+                flash(error, 'danger')
                 return render_template('register.html')
         
         success, message = register_user(email, username, password, birth_date)
@@ -150,6 +262,8 @@ def add_task_route():
     category_id = request.form.get('category_id')
     start_date = request.form.get('start_date')
     end_date = request.form.get('end_date')
+    recurrence_rule = request.form.get('recurrence', '').strip()
+    recurrence_until = request.form.get('recurrence_until', '').strip()
     user_id = session['user_id']
     
     # Validaciones
@@ -177,8 +291,19 @@ def add_task_route():
             flash('Formato de fecha inválido', 'danger')
             return redirect(url_for('tasks'))
     
+    # Validar recurrencia (preset o regla tipo RRULE)
+    recurrence = None
+    if recurrence_rule:
+        try:
+            start = datetime.datetime.strptime(start_date, '%Y-%m-%d') if start_date else datetime.datetime.now()
+            until = datetime.datetime.strptime(recurrence_until, '%Y-%m-%d') if recurrence_until else None
+            recurrence = parse_recurrence(recurrence_rule, start, until)
+        except ValueError as e:
+            flash(f'Recurrencia inválida: {str(e)}', 'danger')
+            return redirect(url_for('tasks'))
+    
     try:
-        success, result = add_task(title, description, category_id, user_id, start_date, end_date)
+        success, result = add_task(title, description, category_id, user_id, start_date, end_date, recurrence)
         if success:
             flash('Tarea agregada correctamente', 'success')
         else:
@@ -317,6 +442,184 @@ def api_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stats/timeseries')
+def api_stats_timeseries():
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autorizado'}), 401
+    
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in ['day', 'week']:
+        return jsonify({'error': 'Granularidad inválida'}), 400
+    
+    try:
+        days = int(request.args.get('days', 30))
+    except ValueError:
+        return jsonify({'error': 'Número de días inválido'}), 400
+    if days < 1 or days > 366:
+        return jsonify({'error': 'El rango debe estar entre 1 y 366 días'}), 400
+    
+    category_filter = request.args.get('category') or None
+    if category_filter and not ObjectId.is_valid(category_filter):
+        return jsonify({'error': 'Categoría inválida'}), 400
+    by_category = request.args.get('by') == 'category'
+    
+    try:
+        user_id = session['user_id']
+        series = get_completion_timeseries(user_id, days, granularity, category_filter, by_category)
+        if series is None:
+            return jsonify({'error': 'No se pudo obtener la serie'}), 500
+        return jsonify(series)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tasks')
+def api_tasks():
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autorizado'}), 401
+    
+    category_filter = request.args.get('category') or None
+    if category_filter and not ObjectId.is_valid(category_filter):
+        return jsonify({'error': 'Categoría inválida'}), 400
+    
+    try:
+        user_id = session['user_id']
+        tasks = iter_task_list(user_id, request.args.get('status'), category_filter)
+        
+        # Los listados pequeños se envían de una vez (y se comprimen)
+        first = list(itertools.islice(tasks, TASK_LIST_STREAM_THRESHOLD))
+        if len(first) < TASK_LIST_STREAM_THRESHOLD:
+            return Response(dumps_json({'tasks': first}), mimetype='application/json')
+        
+        # El cursor sigue usando la sesión causal mientras se envía la respuesta
+        mongo_session = release_causal_session()
+        
+        # compress_response no comprime respuestas en streaming: cada fragmento
+        # se comprime aquí de forma incremental
+        encoding = preferred_encoding()
+        compress_chunk = stream_compressor(encoding) if encoding else None
+        
+        def generate():
+            try:
+                buffer = bytearray(b'{"tasks":[')
+                for index, task in enumerate(itertools.chain(first, tasks)):
+                    if index:
+                        buffer += b','
+                    buffer += dumps_json(task)
+                    if len(buffer) >= STREAM_CHUNK_SIZE:
+                        yield compress_chunk(bytes(buffer)) if compress_chunk else bytes(buffer)
+                        buffer.clear()
+                buffer += b']}'
+                yield compress_chunk(bytes(buffer), final=True) if compress_chunk else bytes(buffer)
+            finally:
+                if mongo_session:
+                    mongo_session.end_session()
+        
+        response = Response(stream_with_context(generate()), mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tasks/<task_id>/description')
+def api_task_description(task_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'No autorizado'}), 401
+    
+    try:
+        description = get_task_description(task_id, session['user_id'])
+        if description is None:
+            return jsonify({'error': 'Tarea no encontrada'}), 404
+        return Response(dumps_json({'id': task_id, 'description': description}), mimetype='application/json')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def is_admin():
+    """Comprobar si el usuario de la sesión es administrador"""
+    return 'user_id' in session and session.get('username') in ADMIN_USERNAMES
+
+def serialize_provisioning_job(job):
+    """Convertir un trabajo de importación en un diccionario apto para JSON"""
+    return {
+        'id': str(job['_id']),
+        'status': job['status'],
+        'format': job['format'],
+        'processed': job['processed'],
+        'created': job['created'],
+        'skipped': job['skipped'],
+        'failed': job['failed'],
+        'errors': job['errors'],
+        'last_error': job.get('last_error'),
+        'created_at': job['created_at'].isoformat(),
+        'updated_at': job['updated_at'].isoformat(),
+        'finished_at': job['finished_at'].isoformat() if job.get('finished_at') else None
+    }
+
+def start_provisioning_job(job_id, force=False):
+    """Procesar un trabajo de importación en segundo plano"""
+    thread = threading.Thread(target=run_provisioning_job, args=(job_id, force), daemon=True)
+    thread.start()
+
+@app.route('/api/admin/users/import', methods=['POST'])
+def api_import_users():
+    if not is_admin():
+        return jsonify({'error': 'No autorizado'}), 403
+    
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'error': 'Archivo requerido'}), 400
+    
+    file_format = request.form.get('format') or detect_format(upload.filename)
+    if file_format not in ['csv', 'ndjson']:
+        return jsonify({'error': 'Formato inválido (csv o ndjson)'}), 400
+    
+    try:
+        # El archivo se guarda para poder reanudar el trabajo si se interrumpe
+        os.makedirs(IMPORTS_DIR, exist_ok=True)
+        source_path = os.path.join(IMPORTS_DIR, f'{ObjectId()}.{file_format}')
+        upload.save(source_path)
+        
+        job_id = create_provisioning_job(source_path, file_format, delete_source=True)
+        start_provisioning_job(job_id)
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': url_for('api_import_users_status', job_id=job_id)
+        }), 202
+    except Exception as e:
+        return jsonify({'error': f'Error del servidor: {str(e)}'}), 500
+
+@app.route('/api/admin/users/import/<job_id>')
+def api_import_users_status(job_id):
+    if not is_admin():
+        return jsonify({'error': 'No autorizado'}), 403
+    
+    job = get_provisioning_job(job_id)
+    if not job:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    return jsonify(serialize_provisioning_job(job))
+
+@app.route('/api/admin/users/import/<job_id>/resume', methods=['POST'])
+def api_import_users_resume(job_id):
+    if not is_admin():
+        return jsonify({'error': 'No autorizado'}), 403
+    
+    job = get_provisioning_job(job_id)
+    if not job:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    if job['status'] == 'completed':
+        return jsonify({'error': 'El trabajo ya terminó'}), 400
+    
+    # force permite retomar un trabajo que quedó "running" tras reiniciar el servidor
+    force = bool((request.get_json(silent=True) or {}).get('force'))
+    if job['status'] == 'running' and not force:
+        return jsonify({'error': 'El trabajo se está ejecutando'}), 409
+    
+    start_provisioning_job(job_id, force)
+    return jsonify({'success': True, 'job_id': job_id}), 202
+
 @app.route('/profile')
 def profile():
     if 'user_id' not in session:
@@ -344,7 +647,11 @@ def logout():
 def format_date(date_obj):
     """Formatear fecha para mostrar"""
     if isinstance(date_obj, str):
-        return date_obj
+        # Los listados ligeros devuelven las fechas ya convertidas a texto ISO
+        try:
+            date_obj = datetime.datetime.fromisoformat(date_obj)
+        except ValueError:
+            return date_obj
     if date_obj:
         return date_obj.strftime('%d/%m/%Y')
     return 'Sin fecha'
@@ -376,4 +683,7 @@ def internal_server_error(e):
     return render_template('error.html', error_code=500, error_message="Error interno del servidor"), 500
 
 if __name__ == '__main__':
+    # Inicializar base de datos
+    init_db()
+    get_asset_manifest()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
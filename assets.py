@@ -0,0 +1,144 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import zlib
+
+# Brotli es opcional: sin él solo se generan variantes gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Rutas del pipeline de recursos estáticos
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_SOURCE_DIR = os.path.join(BASE_DIR, 'assets')
+ASSETS_BUILD_DIR = os.path.join(BASE_DIR, 'static', 'dist')
+MANIFEST_PATH = os.path.join(ASSETS_BUILD_DIR, 'manifest.json')
+
+# Codificaciones soportadas, en orden de preferencia
+COMPRESSED_VARIANTS = [('br', '.br'), ('gzip', '.gz')] if brotli else [('gzip', '.gz')]
+
+def minify_css(source):
+    """Eliminar comentarios y espacios innecesarios de una hoja de estilos"""
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    return source.replace(';}', '}').strip()
+
+def minify_js(source):
+    """Minificación conservadora de JS: quita sangría, líneas vacías y comentarios de línea"""
+    lines = []
+    for line in source.splitlines():
+        line = line.strip()
+        if not line or line.startswith('//'):
+            continue
+        lines.append(line)
+    # Se mantienen los saltos de línea para no depender de la inserción automática de ';'
+    return '\n'.join(lines)
+
+# Niveles de compresión: máximos al compilar (una sola vez) y rápidos por petición
+BUILD_COMPRESSION = {'br': 11, 'gzip': 9}
+RESPONSE_COMPRESSION = {'br': 4, 'gzip': 6}
+
+def compress(data, encoding, levels=BUILD_COMPRESSION):
+    """Comprimir bytes con la codificación indicada ('br' o 'gzip').
+
+    levels indica el nivel por codificación; por defecto el máximo, pensado
+    para los bundles precomprimidos. Para respuestas dinámicas usar
+    RESPONSE_COMPRESSION.
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=levels['br'])
+    return gzip.compress(data, compresslevel=levels['gzip'], mtime=0)
+
+def stream_compressor(encoding, levels=RESPONSE_COMPRESSION):
+    """Compresor incremental para respuestas en streaming.
+
+    Devuelve una función que comprime un fragmento y lo vacía para que el
+    cliente pueda procesarlo en seguida; con final=True cierra el flujo.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=levels['br'])
+
+        def compress_chunk(data, final=False):
+            return compressor.process(data) + (compressor.finish() if final else compressor.flush())
+    else:
+        # wbits 16 + MAX_WBITS: cabecera y cola gzip en lugar de zlib
+        compressor = zlib.compressobj(levels['gzip'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+        def compress_chunk(data, final=False):
+            return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+    return compress_chunk
+
+def _write_file(path, content):
+    with open(path, 'wb') as f:
+        f.write(content)
+
+def build_assets():
+    """Minificar, versionar por contenido y precomprimir los CSS/JS de assets/"""
+    os.makedirs(ASSETS_BUILD_DIR, exist_ok=True)
+
+    manifest = {}
+    for kind, minify in (('css', minify_css), ('js', minify_js)):
+        source_dir = os.path.join(ASSETS_SOURCE_DIR, kind)
+        for filename in sorted(os.listdir(source_dir)):
+            if not filename.endswith('.' + kind):
+                continue
+
+            with open(os.path.join(source_dir, filename), encoding='utf-8') as f:
+                content = minify(f.read()).encode('utf-8')
+
+            # El hash del contenido en el nombre permite cachear el archivo para siempre
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            name, extension = os.path.splitext(filename)
+            bundle = f'{name}.{digest}{extension}'
+
+            _write_file(os.path.join(ASSETS_BUILD_DIR, bundle), content)
+            for encoding, suffix in COMPRESSED_VARIANTS:
+                _write_file(os.path.join(ASSETS_BUILD_DIR, bundle + suffix), compress(content, encoding))
+
+            manifest[filename] = bundle
+
+    # Eliminar bundles de compilaciones anteriores
+    current = set(manifest.values())
+    for filename in os.listdir(ASSETS_BUILD_DIR):
+        if filename == 'manifest.json':
+            continue
+        base = filename
+        for suffix in ('.br', '.gz'):
+            if base.endswith(suffix):
+                base = base[:-len(suffix)]
+        if base not in current:
+            os.remove(os.path.join(ASSETS_BUILD_DIR, filename))
+
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return manifest
+
+def load_asset_manifest():
+    """Cargar el manifiesto de bundles, recompilando si falta o está desactualizado"""
+    try:
+        manifest_mtime = os.path.getmtime(MANIFEST_PATH)
+        for root, _, files in os.walk(ASSETS_SOURCE_DIR):
+            for filename in files:
+                if os.path.getmtime(os.path.join(root, filename)) > manifest_mtime:
+                    return build_assets()
+
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            return json.load(f)
+
+    except (OSError, ValueError):
+        return build_assets()
+
+if __name__ == '__main__':
+    manifest = build_assets()
+    for source, bundle in sorted(manifest.items()):
+        print(f"{source} -> {bundle}")
+    if not brotli:
+        print("Aviso: 'brotli' no está instalado, solo se generaron variantes gzip", file=sys.stderr)
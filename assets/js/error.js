@@ -0,0 +1,36 @@
+// Animación de entrada
+window.addEventListener('load', function() {
+    const container = document.querySelector('.error-container');
+    container.style.opacity = '0';
+    container.style.transform = 'translateY(30px) scale(0.95)';
+    container.style.transition = 'all 0.6s ease';
+
+    setTimeout(() => {
+        container.style.opacity = '1';
+        container.style.transform = 'translateY(0) scale(1)';
+    }, 100);
+});
+
+// Auto-recargar cada 30 segundos si es error 500
+if (document.body.dataset.errorCode === '500') {
+    let countdown = 30;
+    const reloadTimer = setInterval(() => {
+        countdown--;
+        if (countdown <= 0) {
+            location.reload();
+        }
+    }, 1000);
+
+    // Mostrar contador (opcional)
+    const messageElement = document.querySelector('.error-message');
+    if (messageElement) {
+        const originalMessage = messageElement.textContent;
+        const countdownInterval = setInterval(() => {
+            if (countdown > 0) {
+                messageElement.textContent = `${originalMessage} Recargando en ${countdown} segundos...`;
+            } else {
+                clearInterval(countdownInterval);
+            }
+        }, 1000);
+    }
+}
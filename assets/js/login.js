@@ -0,0 +1,86 @@
+// Elementos del DOM
+const usernameInput = document.getElementById('usernameInput');
+const passwordInput = document.getElementById('passwordInput');
+const rememberCheckbox = document.getElementById('rememberCheckbox');
+const submitBtn = document.getElementById('submitBtn');
+const loginForm = document.getElementById('loginForm');
+
+// Cargar usuario recordado al cargar la página
+window.addEventListener('load', function() {
+    // Cargar usuario guardado
+    const rememberedUser = localStorage.getItem('taskflow_remembered_user');
+    if (rememberedUser) {
+        usernameInput.value = rememberedUser;
+        rememberCheckbox.checked = true;
+    }
+
+    // Animación de entrada
+    const container = document.querySelector('.login-container');
+    container.style.opacity = '0';
+    container.style.transform = 'translateY(30px)';
+    container.style.transition = 'all 0.6s ease';
+
+    setTimeout(() => {
+        container.style.opacity = '1';
+        container.style.transform = 'translateY(0)';
+    }, 100);
+});
+
+// Manejar envío del formulario
+loginForm.addEventListener('submit', function(e) {
+    const username = usernameInput.value.trim();
+    const password = passwordInput.value;
+
+    if (!username || !password) {
+        e.preventDefault();
+        alert('Por favor completa todos los campos');
+        return;
+    }
+
+    // Guardar o eliminar usuario recordado
+    if (rememberCheckbox.checked) {
+        localStorage.setItem('taskflow_remembered_user', username);
+    } else {
+        localStorage.removeItem('taskflow_remembered_user');
+    }
+
+    // Cambiar texto del botón
+    submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin" style="margin-right: 8px;"></i>Iniciando sesión...';
+    submitBtn.disabled = true;
+
+    // Re-habilitar el botón después de 5 segundos si no hay redirect
+    setTimeout(() => {
+        submitBtn.innerHTML = '<i class="fas fa-sign-in-alt" style="margin-right: 8px;"></i>Iniciar Sesión';
+        submitBtn.disabled = false;
+    }, 5000);
+});
+
+// Efectos visuales en los inputs
+const inputs = document.querySelectorAll('.form-input');
+inputs.forEach(input => {
+    input.addEventListener('focus', function() {
+        this.style.borderColor = '#667eea';
+        this.style.boxShadow = '0 0 0 4px rgba(102, 126, 234, 0.1)';
+        this.style.transform = 'translateY(-2px)';
+    });
+
+    input.addEventListener('blur', function() {
+        if (!this.value) {
+            this.style.borderColor = '#e2e8f0';
+            this.style.boxShadow = 'none';
+            this.style.transform = 'translateY(0)';
+        }
+    });
+});
+
+// Manejar cambio en checkbox "Recordarme"
+rememberCheckbox.addEventListener('change', function() {
+    if (!this.checked && usernameInput.value) {
+        localStorage.removeItem('taskflow_remembered_user');
+    }
+});
+
+// Auto-focus en el campo de contraseña si hay usuario recordado
+if (usernameInput.value && !passwordInput.value) {
+    passwordInput.focus();
+}
@@ -0,0 +1,180 @@
+// Validación de fortaleza de contraseña
+const passwordInput = document.getElementById('password');
+const confirmPasswordInput = document.getElementById('confirmPassword');
+const passwordStrength = document.getElementById('passwordStrength');
+const passwordMatch = document.getElementById('passwordMatch');
+const submitBtn = document.getElementById('submitBtn');
+
+passwordInput.addEventListener('input', function() {
+    const password = this.value;
+    const strength = calculatePasswordStrength(password);
+
+    passwordStrength.className = 'password-strength';
+
+    if (password.length === 0) {
+        passwordStrength.textContent = '';
+        return;
+    }
+
+    if (strength < 3) {
+        passwordStrength.classList.add('strength-weak');
+        passwordStrength.textContent = 'Contraseña débil';
+    } else if (strength < 5) {
+        passwordStrength.classList.add('strength-medium');
+        passwordStrength.textContent = 'Contraseña media';
+    } else {
+        passwordStrength.classList.add('strength-strong');
+        passwordStrength.textContent = 'Contraseña fuerte';
+    }
+
+    // Verificar coincidencia si hay algo en confirmar
+    if (confirmPasswordInput.value) {
+        checkPasswordMatch();
+    }
+});
+
+confirmPasswordInput.addEventListener('input', checkPasswordMatch);
+
+function checkPasswordMatch() {
+    const password = passwordInput.value;
+    const confirmPassword = confirmPasswordInput.value;
+
+    passwordMatch.className = 'password-match';
+
+    if (confirmPassword.length === 0) {
+        passwordMatch.textContent = '';
+        return;
+    }
+
+    if (password === confirmPassword) {
+        passwordMatch.classList.add('match-success');
+        passwordMatch.innerHTML = '<i class="fas fa-check"></i> Las contraseñas coinciden';
+    } else {
+        passwordMatch.classList.add('match-error');
+        passwordMatch.innerHTML = '<i class="fas fa-times"></i> Las contraseñas no coinciden';
+    }
+
+    updateSubmitButton();
+}
+
+function calculatePasswordStrength(password) {
+    let strength = 0;
+
+    // Longitud
+    if (password.length >= 8) strength++;
+    if (password.length >= 12) strength++;
+
+    // Tipos de caracteres
+    if (/[a-z]/.test(password)) strength++;
+    if (/[A-Z]/.test(password)) strength++;
+    if (/[0-9]/.test(password)) strength++;
+    if (/[^A-Za-z0-9]/.test(password)) strength++;
+
+    return strength;
+}
+
+function updateSubmitButton() {
+    const password = passwordInput.value;
+    const confirmPassword = confirmPasswordInput.value;
+    const passwordsMatch = password === confirmPassword && password.length >= 6;
+
+    if (passwordsMatch) {
+        submitBtn.disabled = false;
+        submitBtn.style.opacity = '1';
+    } else if (confirmPassword.length > 0) {
+        submitBtn.disabled = true;
+        submitBtn.style.opacity = '0.6';
+    }
+}
+
+// Validación de fecha de nacimiento
+const birthDateInput = document.getElementById('birthDate');
+
+// Establecer fecha máxima (13 años atrás)
+const today = new Date();
+const minAge = new Date(today.getFullYear() - 13, today.getMonth(), today.getDate());
+birthDateInput.max = minAge.toISOString().split('T')[0];
+
+// Validación del formulario
+document.getElementById('registerForm').addEventListener('submit', function(e) {
+    const email = document.querySelector('input[name="email"]').value;
+    const username = document.querySelector('input[name="username"]').value;
+    const password = document.querySelector('input[name="password"]').value;
+    const confirmPassword = document.querySelector('input[name="confirm_password"]').value;
+    const birthDate = document.querySelector('input[name="birth_date"]').value;
+
+    // Validar email
+    const emailRegex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
+    if (!emailRegex.test(email)) {
+        e.preventDefault();
+        alert('Por favor ingresa un email válido');
+        return;
+    }
+
+    // Validar contraseñas
+    if (password.length < 6) {
+        e.preventDefault();
+        alert('La contraseña debe tener al menos 6 caracteres');
+        return;
+    }
+
+    if (password !== confirmPassword) {
+        e.preventDefault();
+        alert('Las contraseñas no coinciden');
+        return;
+    }
+
+    // Validar username
+    if (username.length < 3) {
+        e.preventDefault();
+        alert('El nombre de usuario debe tener al menos 3 caracteres');
+        return;
+    }
+
+    // Validar edad si se proporciona fecha de nacimiento
+    if (birthDate) {
+        const birth = new Date(birthDate);
+        const age = today.getFullYear() - birth.getFullYear();
+        const monthDiff = today.getMonth() - birth.getMonth();
+
+        let finalAge = age;
+        if (monthDiff < 0 || (monthDiff === 0 && today.getDate() < birth.getDate())) {
+            finalAge--;
+        }
+
+        if (finalAge < 13) {
+            e.preventDefault();
+            alert('Debes tener al menos 13 años para registrarte');
+            return;
+        }
+    }
+
+    // Cambiar texto del botón
+    submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin" style="margin-right: 8px;"></i>Creando cuenta...';
+    submitBtn.disabled = true;
+});
+
+// Animaciones de entrada
+window.addEventListener('load', function() {
+    const container = document.querySelector('.register-container');
+    container.style.opacity = '0';
+    container.style.transform = 'translateY(30px)';
+    container.style.transition = 'all 0.6s ease';
+
+    setTimeout(() => {
+        container.style.opacity = '1';
+        container.style.transform = 'translateY(0)';
+    }, 100);
+});
+
+// Efectos visuales en los inputs
+const inputs = document.querySelectorAll('.form-input');
+inputs.forEach(input => {
+    input.addEventListener('focus', function() {
+        this.parentElement.style.transform = 'translateY(-2px)';
+    });
+
+    input.addEventListener('blur', function() {
+        this.parentElement.style.transform = 'translateY(0)';
+    });
+});
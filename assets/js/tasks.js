@@ -0,0 +1,278 @@
+// Actualizar estado de tarea
+document.querySelectorAll('.status-select').forEach(select => {
+    select.addEventListener('change', function() {
+        const taskId = this.dataset.taskId;
+        const status = this.value;
+        const taskItem = this.closest('.task-item');
+
+        // Actualizar clases visuales
+        taskItem.className = `task-item status-${status.replace(' ', '-')}`;
+        taskItem.setAttribute('data-task-id', taskId);
+
+        // Actualizar el badge de estado
+        const badge = taskItem.querySelector('.status-badge');
+        badge.className = `status-badge ${status.replace(' ', '-')}`;
+        badge.innerHTML = getStatusIcon(status) + status;
+
+        // Enviar actualización al servidor
+        fetch(`/update_task_status/${taskId}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ status: status })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                showNotification('Estado actualizado correctamente', 'success');
+                updateStats();
+            } else {
+                showNotification('Error al actualizar el estado', 'error');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showNotification('Error al actualizar el estado', 'error');
+        });
+    });
+});
+
+// Descripciones: el listado no las incluye, se piden al desplegarlas
+document.querySelectorAll('.task-description-toggle').forEach(button => {
+    button.addEventListener('click', function() {
+        const description = this.nextElementSibling;
+
+        if (this.dataset.loaded) {
+            description.hidden = !description.hidden;
+            this.innerHTML = `<i class="fas fa-align-left"></i> ${description.hidden ? 'Ver' : 'Ocultar'} descripción`;
+            return;
+        }
+
+        this.disabled = true;
+        fetch(`/api/tasks/${encodeURIComponent(this.dataset.taskId)}/description`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                description.textContent = data.description;
+                description.hidden = false;
+                this.dataset.loaded = 'true';
+                this.innerHTML = '<i class="fas fa-align-left"></i> Ocultar descripción';
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                showNotification('Error al cargar la descripción', 'error');
+            })
+            .finally(() => {
+                this.disabled = false;
+            });
+    });
+});
+
+// Eliminar tarea
+function deleteTask(taskId) {
+    if (!confirm('¿Estás seguro de que quieres eliminar esta tarea?')) {
+        return;
+    }
+
+    fetch(`/delete_task/${taskId}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showNotification('Tarea eliminada correctamente', 'success');
+            document.querySelector(`[data-task-id="${taskId}"]`).remove();
+            updateStats();
+        } else {
+            showNotification('Error al eliminar la tarea', 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showNotification('Error al eliminar la tarea', 'error');
+    });
+}
+
+// Eliminar una serie recurrente completa
+function deleteSeries(seriesId) {
+    if (!confirm('¿Eliminar todas las repeticiones pendientes de esta tarea?')) {
+        return;
+    }
+
+    fetch(`/delete_task/${seriesId}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            window.location.reload();
+        } else {
+            showNotification('Error al eliminar la serie', 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showNotification('Error al eliminar la serie', 'error');
+    });
+}
+
+// NUEVA FUNCIÓN: Eliminar categoría
+function deleteCategory(categoryId, categoryName) {
+    if (!confirm(`¿Estás seguro de que quieres eliminar la categoría "${categoryName}"?\n\nLas tareas de esta categoría se moverán a "Sin categoría".`)) {
+        return;
+    }
+
+    fetch(`/delete_category/${categoryId}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showNotification('Categoría eliminada correctamente', 'success');
+            // Remover la categoría de la lista
+            document.querySelector(`[data-category-id="${categoryId}"]`).remove();
+            // Remover del select de filtros
+            const filterSelect = document.getElementById('categoryFilter');
+            const option = filterSelect.querySelector(`option[value="${categoryId}"]`);
+            if (option) option.remove();
+            // Remover del select de nueva tarea
+            const taskCategorySelect = document.getElementById('category_id');
+            const taskOption = taskCategorySelect.querySelector(`option[value="${categoryId}"]`);
+            if (taskOption) taskOption.remove();
+            // Actualizar la página si se está filtrando por esta categoría
+            if (document.getElementById('categoryFilter').value === categoryId) {
+                window.location.reload();
+            }
+        } else {
+            showNotification('Error al eliminar la categoría', 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showNotification('Error al eliminar la categoría', 'error');
+    });
+}
+
+// Función para obtener el ícono según el estado
+function getStatusIcon(status) {
+    switch(status) {
+        case 'no iniciado':
+            return '<i class="fas fa-pause me-1"></i>';
+        case 'en proceso':
+            return '<i class="fas fa-spinner me-1"></i>';
+        case 'finalizado':
+            return '<i class="fas fa-check me-1"></i>';
+        case 'en problemas':
+            return '<i class="fas fa-exclamation-triangle me-1"></i>';
+        default:
+            return '';
+    }
+}
+
+// Función para mostrar notificaciones
+function showNotification(message, type = 'success') {
+    const notification = document.getElementById('notification');
+    notification.textContent = message;
+    notification.style.display = 'block';
+
+    if (type === 'success') {
+        notification.style.background = 'linear-gradient(45deg, #48bb78, #38a169)';
+        notification.classList.remove('error');
+    } else {
+        notification.style.background = 'linear-gradient(45deg, #f56565, #e53e3e)';
+        notification.classList.add('error');
+    }
+
+    notification.classList.add('show');
+
+    // Ocultar después de 3 segundos
+    setTimeout(() => {
+        notification.classList.remove('show');
+        setTimeout(() => {
+            notification.style.display = 'none';
+        }, 300);
+    }, 3000);
+}
+
+// Filtros
+function filterTasks(status) {
+    const url = new URL(window.location);
+    if (status) {
+        url.searchParams.set('status', status);
+    } else {
+        url.searchParams.delete('status');
+    }
+    window.location.href = url.toString();
+}
+
+function applyFilters() {
+    const status = document.getElementById('statusFilter').value;
+    const category = document.getElementById('categoryFilter').value;
+
+    const url = new URL(window.location);
+
+    if (status) {
+        url.searchParams.set('status', status);
+    } else {
+        url.searchParams.delete('status');
+    }
+
+    if (category) {
+        url.searchParams.set('category', category);
+    } else {
+        url.searchParams.delete('category');
+    }
+
+    window.location.href = url.toString();
+}
+
+function clearFilters() {
+    window.location.href = '/tasks';
+}
+
+// Función para actualizar estadísticas
+function updateStats() {
+    fetch('/api/stats')
+        .then(response => response.json())
+        .then(data => {
+            document.querySelectorAll('.stat-number').forEach((el, index) => {
+                switch(index) {
+                    case 0: el.textContent = data.total; break;
+                    case 1: el.textContent = data['en proceso']; break;
+                    case 2: el.textContent = data.finalizado; break;
+                    case 3: el.textContent = data['en problemas']; break;
+                }
+            });
+        })
+        .catch(error => console.error('Error updating stats:', error));
+}
+
+// Establecer fecha mínima para los inputs de fecha
+document.addEventListener('DOMContentLoaded', function() {
+    const today = new Date().toISOString().split('T')[0];
+    document.getElementById('start_date').min = today;
+    document.getElementById('end_date').min = today;
+
+    // Validación de fechas
+    document.getElementById('start_date').addEventListener('change', function() {
+        const endDateInput = document.getElementById('end_date');
+        endDateInput.min = this.value;
+        if (endDateInput.value && endDateInput.value < this.value) {
+            endDateInput.value = this.value;
+        }
+    });
+});
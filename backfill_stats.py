@@ -0,0 +1,19 @@
+import sys
+
+from database import init_db, backfill_task_stats
+
+# Reconstruye los resúmenes diarios de tareas finalizadas.
+# Ejecutar con la aplicación detenida: los cambios de estado que lleguen
+# durante la reconstrucción no quedarían reflejados en los resúmenes.
+# Uso: python backfill_stats.py [user_id]
+if __name__ == '__main__':
+    user_id = sys.argv[1] if len(sys.argv) > 1 else None
+    
+    init_db()
+    success, result = backfill_task_stats(user_id)
+    
+    if success:
+        print(f"Resúmenes diarios reconstruidos: {result}")
+    else:
+        print(result)
+        sys.exit(1)
@@ -1,21 +1,130 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import BulkWriteError
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
 from datetime import datetime, timedelta
 import bcrypt
+from accounts import hash_password
+from bson import json_util
 from bson.objectid import ObjectId
+from recurrence import expand_occurrences, describe_recurrence
+import contextvars
+import heapq
 import os
 
 # Configuración de MongoDB
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
 DATABASE_NAME = 'taskflow_db'
 
-# Cliente de MongoDB
-client = MongoClient(MONGODB_URI)
+# Lecturas del dashboard: a dónde se envían y cuánto retraso de réplica se tolera.
+# MongoDB exige un desfase máximo de al menos 90 segundos; -1 desactiva el límite.
+DASHBOARD_READ_PREFERENCE = os.getenv('MONGODB_DASHBOARD_READ_PREFERENCE', 'secondaryPreferred')
+MAX_STALENESS_SECONDS = int(os.getenv('MONGODB_MAX_STALENESS_SECONDS', '90'))
+
+# Categorías que se crean para cada usuario nuevo
+DEFAULT_CATEGORIES = ["Personal", "Trabajo", "Estudios", "Hogar"]
+
+# Ventana (en días) en la que se generan las ocurrencias de tareas recurrentes
+RECURRENCE_WINDOW_DAYS = 14
+
+# Días hacia atrás en los que siguen visibles las ocurrencias no completadas
+RECURRENCE_LOOKBACK_DAYS = 7
+
+# Cliente de MongoDB. connect=False retrasa la conexión hasta la primera operación,
+# así importar este módulo (p. ej. en los procesos de hash) no abre conexiones.
+client = MongoClient(MONGODB_URI, connect=False)
 db = client[DATABASE_NAME]
 
 # Colecciones
 users_collection = db.users
 categories_collection = db.categories
 tasks_collection = db.tasks
+task_stats_collection = db.task_stats_daily
+provisioning_jobs_collection = db.provisioning_jobs
+
+def _dashboard_read_preference():
+    """Preferencia de lectura para las consultas pesadas del dashboard"""
+    modes = {
+        'primary': Primary,
+        'primaryPreferred': PrimaryPreferred,
+        'secondary': Secondary,
+        'secondaryPreferred': SecondaryPreferred,
+        'nearest': Nearest
+    }
+    if DASHBOARD_READ_PREFERENCE not in modes:
+        raise ValueError(f"Preferencia de lectura desconocida: {DASHBOARD_READ_PREFERENCE}")
+    if DASHBOARD_READ_PREFERENCE == 'primary':
+        return Primary()
+    max_staleness = max(MAX_STALENESS_SECONDS, 90) if MAX_STALENESS_SECONDS > 0 else -1
+    return modes[DASHBOARD_READ_PREFERENCE](max_staleness=max_staleness)
+
+# Colecciones para lecturas del dashboard, enviadas a secundarios.
+# Con read concern "majority" y sesiones causales el usuario ve sus propias escrituras.
+_dashboard_options = {
+    "read_preference": _dashboard_read_preference(),
+    "read_concern": ReadConcern("majority")
+}
+dashboard_tasks_collection = tasks_collection.with_options(**_dashboard_options)
+dashboard_categories_collection = categories_collection.with_options(**_dashboard_options)
+dashboard_task_stats_collection = task_stats_collection.with_options(**_dashboard_options)
+
+# Sesión causal de la petición en curso (ver begin_causal_session)
+_request_session = contextvars.ContextVar('request_session', default=None)
+
+def begin_causal_session(token=None):
+    """Preparar la sesión causal de la petición a partir del token guardado del usuario.
+    
+    La sesión de MongoDB se abre de forma perezosa la primera vez que se usa.
+    """
+    _request_session.set({"token": token, "session": None})
+
+def _causal_session(write=False):
+    """Sesión causal de la petición actual, o None fuera de una petición.
+    
+    Las operaciones de escritura pasan write=True para que el token del
+    usuario solo se actualice en las peticiones que escriben.
+    """
+    state = _request_session.get()
+    if state is None:
+        return None
+    if write:
+        state["wrote"] = True
+    
+    if state["session"] is None:
+        mongo_session = client.start_session(causal_consistency=True)
+        if state["token"]:
+            # Las lecturas en secundarios esperarán hasta ver las escrituras del token
+            token = json_util.loads(state["token"])
+            mongo_session.advance_cluster_time(token["cluster_time"])
+            mongo_session.advance_operation_time(token["operation_time"])
+        state["session"] = mongo_session
+    
+    return state["session"]
+
+def release_causal_session():
+    """Separar la sesión de la petición para que la cierre quien la usa (respuestas en streaming)"""
+    state = _request_session.get()
+    _request_session.set(None)
+    return state["session"] if state else None
+
+def end_causal_session():
+    """Cerrar la sesión de la petición y devolver el token actualizado para el usuario"""
+    state = _request_session.get()
+    _request_session.set(None)
+    if state is None or state["session"] is None:
+        return state["token"] if state else None
+    
+    mongo_session = state["session"]
+    token = state["token"]
+    if (state.get("wrote") and mongo_session.operation_time is not None
+            and mongo_session.cluster_time is not None):
+        token = json_util.dumps({
+            "cluster_time": mongo_session.cluster_time,
+            "operation_time": mongo_session.operation_time
+        })
+    
+    mongo_session.end_session()
+    return token
 
 def init_db():
     """Inicializar índices y configuración de la base de datos"""
@@ -26,8 +135,23 @@ def init_db():
         
         # Índices para mejor rendimiento
         tasks_collection.create_index([("user_id", 1), ("created_at", -1)])
+        
+        # Ocurrencias materializadas de tareas recurrentes (una por serie y fecha)
+        tasks_collection.create_index(
+            [("series_id", 1), ("occurrence_date", 1)],
+            unique=True,
+            partialFilterExpression={"series_id": {"$exists": True}}
+        )
         categories_collection.create_index("user_id")
         
+        # Resúmenes diarios de tareas finalizadas (uno por usuario, día y categoría)
+        task_stats_collection.create_index(
+            [("user_id", 1), ("day", 1), ("category_id", 1)], unique=True
+        )
+        
+        # Usuarios creados por importaciones masivas (para reanudar trabajos)
+        users_collection.create_index("provisioning_job_id", sparse=True)
+        
         print("Base de datos MongoDB inicializada correctamente")
         return True
     except Exception as e:
@@ -42,7 +166,7 @@ def register_user(email, username, password, birth_date):
             return False, "El usuario o email ya existe"
         
         # Hash de la contraseña
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        password_hash = hash_password(password)
         
         # Crear documento del usuario
         user_data = {
@@ -58,8 +182,7 @@ def register_user(email, username, password, birth_date):
         result = users_collection.insert_one(user_data)
         
         # Crear categorías por defecto
-        default_categories = ["Personal", "Trabajo", "Estudios", "Hogar"]
-        for category_name in default_categories:
+        for category_name in DEFAULT_CATEGORIES:
             categories_collection.insert_one({
                 "name": category_name,
                 "user_id": result.inserted_id,
@@ -71,6 +194,123 @@ def register_user(email, username, password, birth_date):
     except Exception as e:
         return False, f"Error al registrar usuario: {str(e)}"
 
+def find_existing_users(emails, usernames):
+    """Buscar en una sola consulta los usuarios que ya usan alguno de los emails o usernames"""
+    return list(users_collection.find(
+        {"$or": [{"email": {"$in": list(emails)}}, {"username": {"$in": list(usernames)}}]},
+        {"email": 1, "username": 1, "provisioning_job_id": 1, "provisioning_offset": 1}
+    ))
+
+def insert_provisioned_users(users):
+    """Insertar un lote de usuarios con insert_many y crear sus categorías por defecto.
+    
+    Devuelve (ids insertados, errores por índice del lote). Los duplicados que
+    aparezcan entre la comprobación previa y la inserción se reportan como error.
+    """
+    errors = {}
+    try:
+        users_collection.insert_many(users, ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            if write_error.get("code") == 11000:
+                errors[write_error["index"]] = "El usuario o email ya existe"
+            else:
+                errors[write_error["index"]] = write_error.get("errmsg", "Error al insertar usuario")
+    
+    inserted_ids = [user["_id"] for index, user in enumerate(users) if index not in errors]
+    ensure_default_categories(inserted_ids)
+    return inserted_ids, errors
+
+def ensure_default_categories(user_ids):
+    """Crear con un único insert_many las categorías por defecto que falten"""
+    if not user_ids:
+        return 0
+    
+    # Se comparan pares (usuario, nombre): un insert_many interrumpido puede
+    # haber dejado a un usuario con solo parte de las categorías
+    existing = {
+        (category["user_id"], category["name"])
+        for category in categories_collection.find(
+            {"user_id": {"$in": list(user_ids)}, "name": {"$in": DEFAULT_CATEGORIES}},
+            {"user_id": 1, "name": 1}
+        )
+    }
+    now = datetime.now()
+    categories = [
+        {"name": category_name, "user_id": user_id, "created_at": now}
+        for user_id in user_ids
+        for category_name in DEFAULT_CATEGORIES
+        if (user_id, category_name) not in existing
+    ]
+    if categories:
+        categories_collection.insert_many(categories, ordered=False)
+    return len(categories)
+
+def create_provisioning_job(source_path, file_format, delete_source=False):
+    """Registrar un trabajo de importación masiva de usuarios"""
+    job = {
+        "source_path": source_path,
+        "format": file_format,
+        "delete_source": delete_source,
+        "status": "pending",
+        "processed": 0,
+        "created": 0,
+        "skipped": 0,
+        "failed": 0,
+        "errors": [],
+        "created_at": datetime.now(),
+        "updated_at": datetime.now(),
+        "finished_at": None
+    }
+    result = provisioning_jobs_collection.insert_one(job)
+    return str(result.inserted_id)
+
+def get_provisioning_job(job_id):
+    """Obtener un trabajo de importación"""
+    try:
+        if isinstance(job_id, str):
+            job_id = ObjectId(job_id)
+        return provisioning_jobs_collection.find_one({"_id": job_id})
+    except Exception as e:
+        print(f"Error al obtener trabajo de importación: {e}")
+        return None
+
+def claim_provisioning_job(job_id, force=False):
+    """Marcar un trabajo como en ejecución si nadie más lo está procesando.
+    
+    Con force también se retoma un trabajo que quedó "running" tras una caída.
+    """
+    if isinstance(job_id, str):
+        job_id = ObjectId(job_id)
+    statuses = ["pending", "failed", "running"] if force else ["pending", "failed"]
+    return provisioning_jobs_collection.find_one_and_update(
+        {"_id": job_id, "status": {"$in": statuses}},
+        {"$set": {"status": "running", "updated_at": datetime.now()}},
+        return_document=ReturnDocument.AFTER
+    )
+
+def record_provisioning_progress(job_id, processed, created=0, skipped=0, failed=0, errors=None):
+    """Guardar el avance de un lote ya confirmado (punto de reanudación)"""
+    update = {
+        "$set": {"processed": processed, "updated_at": datetime.now()},
+        "$inc": {"created": created, "skipped": skipped, "failed": failed}
+    }
+    if errors:
+        # Solo se conservan los primeros errores para no hacer crecer el documento
+        update["$push"] = {"errors": {"$each": errors, "$slice": 100}}
+    return provisioning_jobs_collection.find_one_and_update(
+        {"_id": job_id}, update, return_document=ReturnDocument.AFTER
+    )
+
+def finish_provisioning_job(job_id, status, error=None):
+    """Marcar un trabajo como terminado ("completed") o fallido ("failed")"""
+    update = {"status": status, "updated_at": datetime.now()}
+    if status == "completed":
+        update["finished_at"] = datetime.now()
+    if error:
+        update["last_error"] = error
+    provisioning_jobs_collection.update_one({"_id": job_id}, {"$set": update})
+
 def authenticate_user(username_or_email, password):
     """Autenticar usuario por email o username"""
     try:
@@ -106,48 +346,317 @@ def get_user_by_id(user_id):
         print(f"Error al obtener usuario: {e}")
         return None
 
-def get_user_tasks(user_id, status_filter=None, category_filter=None):
-    """Obtener tareas del usuario con filtros opcionales"""
+def _task_list_filters(user_id, status_filter=None, category_filter=None):
+    """Construir las queries de tareas normales y de series recurrentes para un listado.
+    
+    Devuelve (query, series_query); series_query es None cuando el filtro de
+    estado excluye las ocurrencias no materializadas (siempre "no iniciado").
+    """
+    query = {"user_id": user_id, "recurrence": {"$exists": False}}
+    series_query = {"user_id": user_id, "recurrence": {"$exists": True}}
+    if status_filter:
+        query["status"] = status_filter
+    if category_filter:
+        query["category_id"] = ObjectId(category_filter)
+        series_query["category_id"] = ObjectId(category_filter)
+    
+    if status_filter and status_filter != "no iniciado":
+        series_query = None
+    return query, series_query
+
+def _series_window(window_start=None, window_end=None):
+    """Ventana por defecto en la que se expanden las series recurrentes.
+    
+    Empieza unos días antes de hoy para que una ocurrencia no completada
+    siga apareciendo como pendiente en lugar de desaparecer al día siguiente.
+    """
+    now = datetime.now()
+    if window_start is None:
+        window_start = now - timedelta(days=RECURRENCE_LOOKBACK_DAYS)
+    if window_end is None:
+        window_end = now + timedelta(days=RECURRENCE_WINDOW_DAYS)
+    return window_start, window_end
+
+def get_user_tasks(user_id, status_filter=None, category_filter=None, window_start=None, window_end=None):
+    """Obtener tareas del usuario con filtros opcionales.
+    
+    Devuelve el listado ligero: en lugar de la descripción solo se indica
+    has_description, y la página la pide a /api/tasks/<id>/description.
+    """
+    try:
+        return list(iter_task_list(user_id, status_filter, category_filter, window_start, window_end))
+        
+    except Exception as e:
+        print(f"Error al obtener tareas: {e}")
+        return []
+
+def _task_list_stages(include_description=False):
+    """Etapas de agregación para listados ligeros.
+    
+    Descarta los campos que la lista no usa antes del $lookup y convierte ids
+    y fechas a texto dentro de MongoDB, de modo que el resultado se puede
+    serializar a JSON directamente.
+    """
+    fields = {
+        "title": 1, "status": 1, "category_id": 1, "start_date": 1, "end_date": 1,
+        "created_at": 1, "series_id": 1, "occurrence_date": 1
+    }
+    if include_description:
+        fields["description"] = 1
+    else:
+        fields["has_description"] = {"$ne": [{"$ifNull": ["$description", ""]}, ""]}
+    
+    formatted = {
+        "_id": 0,
+        "id": {"$toString": "$_id"},
+        "title": 1,
+        "status": 1,
+        "category_id": {"$toString": "$category_id"},
+        "category_name": {"$ifNull": [{"$arrayElemAt": ["$category.name", 0]}, None]},
+        "start_date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$start_date"}},
+        "end_date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$end_date"}},
+        "created_at": {"$dateToString": {"format": "%Y-%m-%dT%H:%M:%S", "date": "$created_at"}},
+        "series_id": {"$toString": "$series_id"},
+        "occurrence_date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$occurrence_date"}}
+    }
+    formatted["description" if include_description else "has_description"] = 1
+    
+    return [
+        {"$project": fields},
+        {"$lookup": {
+            "from": "categories",
+            "localField": "category_id",
+            "foreignField": "_id",
+            "as": "category"
+        }},
+        {"$project": formatted}
+    ]
+
+def _lean_occurrence(occurrence, include_description=False):
+    """Dar a una ocurrencia generada en memoria la forma del listado ligero"""
+    lean = {
+        "id": occurrence["id"],
+        "title": occurrence["title"],
+        "status": occurrence["status"],
+        "category_id": str(occurrence["category_id"]) if occurrence.get("category_id") else None,
+        "category_name": occurrence.get("category_name"),
+        "start_date": occurrence["start_date"],
+        "end_date": occurrence["end_date"],
+        "created_at": occurrence["created_at"].strftime('%Y-%m-%dT%H:%M:%S'),
+        "series_id": occurrence["series_id"],
+        "occurrence_date": occurrence["occurrence_date"],
+        "recurrence_text": occurrence["recurrence_text"]
+    }
+    if include_description:
+        lean["description"] = occurrence.get("description")
+    else:
+        lean["has_description"] = bool(occurrence.get("description"))
+    return lean
+
+def iter_task_list(user_id, status_filter=None, category_filter=None, window_start=None, window_end=None,
+                   include_description=False):
+    """Iterar el listado ligero de tareas, ordenado por creación.
+    
+    Las tareas se leen con un cursor, así que el listado puede enviarse al
+    cliente a medida que llega de MongoDB. Sin include_description solo se
+    indica si la tarea tiene descripción (has_description).
+    """
     try:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
         
-        # Construir query
-        query = {"user_id": user_id}
-        if status_filter:
-            query["status"] = status_filter
-        if category_filter:
-            query["category_id"] = ObjectId(category_filter)
+        query, series_query = _task_list_filters(user_id, status_filter, category_filter)
         
-        # Obtener tareas con información de categoría
-        pipeline = [
-            {"$match": query},
-            {"$lookup": {
-                "from": "categories",
-                "localField": "category_id",
-                "foreignField": "_id",
-                "as": "category"
-            }},
-            {"$sort": {"created_at": -1}}
-        ]
+        pipeline = [{"$match": query}, {"$sort": {"created_at": -1}}] + _task_list_stages(include_description)
+        cursor = dashboard_tasks_collection.aggregate(pipeline, session=_causal_session(), batchSize=500)
         
-        tasks = list(tasks_collection.aggregate(pipeline))
+        occurrences = []
+        if series_query:
+            window_start, window_end = _series_window(window_start, window_end)
+            occurrences = [
+                _lean_occurrence(occurrence, include_description)
+                for occurrence in get_series_occurrences(user_id, series_query, window_start, window_end)
+            ]
+            occurrences.sort(key=lambda task: task["created_at"], reverse=True)
         
-        # Procesar resultados
-        for task in tasks:
-            task['id'] = str(task['_id'])
-            task['category_name'] = task['category'][0]['name'] if task['category'] else None
-            # Formatear fechas
-            if task.get('start_date'):
-                task['start_date'] = task['start_date'].strftime('%Y-%m-%d')
-            if task.get('end_date'):
-                task['end_date'] = task['end_date'].strftime('%Y-%m-%d')
+        # Ambas fuentes ya vienen ordenadas: se combinan sin cargar el cursor en memoria
+        return heapq.merge(cursor, occurrences, key=lambda task: task["created_at"], reverse=True)
         
-        return tasks
+    except Exception as e:
+        print(f"Error al obtener listado de tareas: {e}")
+        return iter([])
+
+def get_task_description(task_id, user_id):
+    """Obtener solo la descripción de una tarea (o de la serie de una ocurrencia)"""
+    try:
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        
+        occurrence = _parse_occurrence_id(task_id)
+        if occurrence:
+            series_id, occurrence_date = occurrence
+            # Si la ocurrencia ya se materializó, su descripción puede haber cambiado
+            task = dashboard_tasks_collection.find_one(
+                {"series_id": series_id, "occurrence_date": occurrence_date, "user_id": user_id},
+                {"description": 1},
+                session=_causal_session()
+            )
+            if not task:
+                task = dashboard_tasks_collection.find_one(
+                    {"_id": series_id, "user_id": user_id},
+                    {"description": 1},
+                    session=_causal_session()
+                )
+        else:
+            if isinstance(task_id, str):
+                task_id = ObjectId(task_id)
+            task = dashboard_tasks_collection.find_one(
+                {"_id": task_id, "user_id": user_id},
+                {"description": 1},
+                session=_causal_session()
+            )
+        
+        if not task:
+            return None
+        return task.get("description") or ""
         
     except Exception as e:
-        print(f"Error al obtener tareas: {e}")
+        print(f"Error al obtener descripción: {e}")
+        return None
+
+def _occurrence_id(series_id, occurrence_date):
+    """Identificador de una ocurrencia no materializada: <serie>_<AAAAMMDD>"""
+    return f"{series_id}_{occurrence_date.strftime('%Y%m%d')}"
+
+def _parse_occurrence_id(task_id):
+    """Separar un identificador de ocurrencia en (serie, fecha), o None si no lo es"""
+    if not isinstance(task_id, str) or '_' not in task_id:
+        return None
+    series_id, day = task_id.split('_', 1)
+    return ObjectId(series_id), datetime.strptime(day, '%Y%m%d')
+
+def get_series_occurrences(user_id, series_query, window_start, window_end, date_field="start_date"):
+    """Generar las ocurrencias de las series recurrentes dentro de la ventana.
+    
+    Solo se leen los documentos maestros y las ocurrencias ya materializadas
+    de la ventana; el resto se calcula en memoria.
+    """
+    series = list(dashboard_tasks_collection.find(series_query, session=_causal_session()))
+    if not series:
         return []
+    
+    # Las ocurrencias se guardan a medianoche
+    window_start = datetime(window_start.year, window_start.month, window_start.day)
+    
+    categories = {category['_id']: category['name'] for category in get_user_categories(user_id)}
+    
+    # Duración de cada serie, para situar la fecha límite de sus ocurrencias
+    durations = {}
+    for master in series:
+        if master.get("start_date") and master.get("end_date"):
+            durations[master["_id"]] = master["end_date"] - master["start_date"]
+    
+    # Para tareas próximas se filtra por la fecha límite de cada ocurrencia
+    lookback = timedelta(0)
+    if date_field == "end_date" and durations:
+        lookback = max(max(durations.values()), timedelta(0))
+    
+    # Fechas de la ventana que ya existen como documento (editadas o completadas)
+    materialized = set()
+    for task in dashboard_tasks_collection.find(
+        {
+            "series_id": {"$in": [master["_id"] for master in series]},
+            "occurrence_date": {"$gte": window_start - lookback, "$lte": window_end}
+        },
+        {"series_id": 1, "occurrence_date": 1},
+        session=_causal_session()
+    ):
+        materialized.add((task["series_id"], task["occurrence_date"]))
+    
+    occurrences = []
+    for master in series:
+        start = master.get("start_date") or master["created_at"]
+        duration = durations.get(master["_id"])
+        excluded = set(master.get("exdates") or [])
+        
+        for occurrence_date in expand_occurrences(master["recurrence"], start, window_start - lookback, window_end):
+            if occurrence_date in excluded or (master["_id"], occurrence_date) in materialized:
+                continue
+            
+            end_date = occurrence_date + duration if duration is not None else None
+            if date_field == "end_date":
+                due_date = end_date or occurrence_date
+                if due_date < window_start or due_date > window_end:
+                    continue
+            
+            occurrences.append({
+                "id": _occurrence_id(master["_id"], occurrence_date),
+                "series_id": str(master["_id"]),
+                "occurrence_date": occurrence_date.strftime('%Y-%m-%d'),
+                "recurrence_text": describe_recurrence(master["recurrence"]),
+                "title": master["title"],
+                "description": master.get("description"),
+                "status": "no iniciado",
+                "category_id": master.get("category_id"),
+                "category_name": categories.get(master.get("category_id")),
+                "user_id": master["user_id"],
+                "start_date": occurrence_date.strftime('%Y-%m-%d'),
+                "end_date": end_date.strftime('%Y-%m-%d') if end_date else None,
+                "created_at": master["created_at"],
+                "completed_at": None
+            })
+    
+    return occurrences
+
+def materialize_occurrence(series_id, occurrence_date, user_id):
+    """Crear (si no existe) el documento de una ocurrencia y devolver su _id"""
+    master = tasks_collection.find_one(
+        {"_id": series_id, "user_id": user_id, "recurrence": {"$exists": True}},
+        session=_causal_session()
+    )
+    if not master:
+        return None
+    
+    start = master.get("start_date") or master["created_at"]
+    if occurrence_date not in expand_occurrences(master["recurrence"], start, occurrence_date, occurrence_date):
+        return None
+    if occurrence_date in (master.get("exdates") or []):
+        return None
+    
+    end_date = None
+    if master.get("start_date") and master.get("end_date"):
+        end_date = occurrence_date + (master["end_date"] - master["start_date"])
+    
+    # upsert idempotente gracias al índice único (serie, fecha)
+    task = tasks_collection.find_one_and_update(
+        {"series_id": series_id, "occurrence_date": occurrence_date},
+        {"$setOnInsert": {
+            "title": master["title"],
+            "description": master.get("description"),
+            "status": "no iniciado",
+            "category_id": master.get("category_id"),
+            "user_id": user_id,
+            "start_date": occurrence_date,
+            "end_date": end_date,
+            "created_at": datetime.now(),
+            "updated_at": datetime.now(),
+            "completed_at": None
+        }},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+        session=_causal_session(write=True)
+    )
+    return task["_id"]
+
+def _resolve_task_id(task_id, user_id):
+    """Convertir el id recibido en ObjectId, materializando la ocurrencia si hace falta"""
+    occurrence = _parse_occurrence_id(task_id)
+    if occurrence:
+        series_id, occurrence_date = occurrence
+        return materialize_occurrence(series_id, occurrence_date, user_id)
+    if isinstance(task_id, str):
+        return ObjectId(task_id)
+    return task_id
 
 def get_user_categories(user_id):
     """Obtener categorías del usuario"""
@@ -155,7 +664,7 @@ def get_user_categories(user_id):
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
         
-        categories = list(categories_collection.find({"user_id": user_id}).sort("name", 1))
+        categories = list(dashboard_categories_collection.find({"user_id": user_id}, session=_causal_session()).sort("name", 1))
         
         # Convertir ObjectId a string
         for category in categories:
@@ -167,8 +676,8 @@ def get_user_categories(user_id):
         print(f"Error al obtener categorías: {e}")
         return []
 
-def add_task(title, description, category_id, user_id, start_date, end_date=None):
-    """Agregar nueva tarea"""
+def add_task(title, description, category_id, user_id, start_date, end_date=None, recurrence=None):
+    """Agregar nueva tarea (o una serie recurrente si se indica recurrence)"""
     try:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
@@ -188,7 +697,15 @@ def add_task(title, description, category_id, user_id, start_date, end_date=None
             "completed_at": None
         }
         
-        result = tasks_collection.insert_one(task_data)
+        # Una serie recurrente es un único documento maestro; las ocurrencias se generan al consultar
+        if recurrence:
+            if not task_data["start_date"]:
+                today = datetime.now()
+                task_data["start_date"] = datetime(today.year, today.month, today.day)
+            task_data["recurrence"] = recurrence
+            task_data["exdates"] = []
+        
+        result = tasks_collection.insert_one(task_data, session=_causal_session(write=True))
         return True, str(result.inserted_id)
         
     except Exception as e:
@@ -197,28 +714,45 @@ def add_task(title, description, category_id, user_id, start_date, end_date=None
 def update_task_status(task_id, status, user_id):
     """Actualizar estado de tarea"""
     try:
-        if isinstance(task_id, str):
-            task_id = ObjectId(task_id)
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
         
+        # Editar una ocurrencia recurrente la convierte en documento
+        task_id = _resolve_task_id(task_id, user_id)
+        if not task_id:
+            return False
+        
         update_data = {
             "status": status,
             "updated_at": datetime.now()
         }
         
-        # Si se marca como finalizado, agregar fecha de completado
-        if status == "finalizado":
-            update_data["completed_at"] = datetime.now()
-        elif status != "finalizado":
-            update_data["completed_at"] = None
-        
-        result = tasks_collection.update_one(
+        previous = tasks_collection.find_one_and_update(
             {"_id": task_id, "user_id": user_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE,
+            session=_causal_session(write=True)
         )
         
-        return result.modified_count > 0
+        if not previous:
+            return False
+        
+        current = {**previous, **update_data}
+        
+        # Ajustar la fecha de completado solo cuando el estado cambia realmente
+        was_finished = previous.get("status") == "finalizado"
+        is_finished = status == "finalizado"
+        if was_finished != is_finished:
+            current["completed_at"] = datetime.now() if is_finished else None
+            tasks_collection.update_one(
+                {"_id": task_id, "user_id": user_id},
+                {"$set": {"completed_at": current["completed_at"]}},
+                session=_causal_session(write=True)
+            )
+        
+        # Mantener los resúmenes diarios de productividad
+        sync_completion_stats(previous, current)
+        return True
         
     except Exception as e:
         print(f"Error al actualizar estado: {e}")
@@ -227,11 +761,14 @@ def update_task_status(task_id, status, user_id):
 def update_task(task_id, user_id, **kwargs):
     """Actualizar tarea completa"""
     try:
-        if isinstance(task_id, str):
-            task_id = ObjectId(task_id)
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
         
+        # Editar una ocurrencia recurrente la convierte en documento
+        task_id = _resolve_task_id(task_id, user_id)
+        if not task_id:
+            return False
+        
         # Preparar datos de actualización
         update_data = {"updated_at": datetime.now()}
         
@@ -244,12 +781,32 @@ def update_task(task_id, user_id, **kwargs):
                 else:
                     update_data[key] = value
         
-        result = tasks_collection.update_one(
+        previous = tasks_collection.find_one_and_update(
             {"_id": task_id, "user_id": user_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE,
+            session=_causal_session(write=True)
         )
         
-        return result.modified_count > 0
+        if not previous:
+            return False
+        
+        current = {**previous, **update_data}
+        
+        # Ajustar la fecha de completado solo cuando el estado cambia realmente
+        was_finished = previous.get("status") == "finalizado"
+        is_finished = current.get("status") == "finalizado"
+        if was_finished != is_finished:
+            current["completed_at"] = datetime.now() if is_finished else None
+            tasks_collection.update_one(
+                {"_id": task_id, "user_id": user_id},
+                {"$set": {"completed_at": current["completed_at"]}},
+                session=_causal_session(write=True)
+            )
+        
+        # Mantener los resúmenes diarios de productividad
+        sync_completion_stats(previous, current)
+        return True
         
     except Exception as e:
         print(f"Error al actualizar tarea: {e}")
@@ -258,13 +815,65 @@ def update_task(task_id, user_id, **kwargs):
 def delete_task(task_id, user_id):
     """Eliminar tarea"""
     try:
-        if isinstance(task_id, str):
-            task_id = ObjectId(task_id)
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
         
-        result = tasks_collection.delete_one({"_id": task_id, "user_id": user_id})
-        return result.deleted_count > 0
+        # Eliminar una ocurrencia recurrente la excluye de su serie
+        occurrence = _parse_occurrence_id(task_id)
+        if occurrence:
+            series_id, occurrence_date = occurrence
+            result = tasks_collection.update_one(
+                {"_id": series_id, "user_id": user_id, "recurrence": {"$exists": True}},
+                {"$addToSet": {"exdates": occurrence_date}},
+                session=_causal_session(write=True)
+            )
+            if not result.matched_count:
+                return False
+            task_id = tasks_collection.find_one(
+                {"series_id": series_id, "occurrence_date": occurrence_date, "user_id": user_id}, {"_id": 1},
+                session=_causal_session(write=True)
+            )
+            if not task_id:
+                return True
+            task_id = task_id["_id"]
+        elif isinstance(task_id, str):
+            task_id = ObjectId(task_id)
+        
+        deleted = tasks_collection.find_one_and_delete({"_id": task_id, "user_id": user_id}, session=_causal_session(write=True))
+        if not deleted:
+            return False
+        
+        if deleted.get("series_id"):
+            tasks_collection.update_one(
+                {"_id": deleted["series_id"]},
+                {"$addToSet": {"exdates": deleted["occurrence_date"]}},
+                session=_causal_session(write=True)
+            )
+
+        # Al eliminar una serie se borran sus ocurrencias pendientes;
+        # las finalizadas se conservan como tareas normales (historial)
+        if deleted.get("recurrence"):
+            pending = list(tasks_collection.find(
+                {"series_id": deleted["_id"], "user_id": user_id, "status": {"$ne": "finalizado"}},
+                session=_causal_session()
+            ))
+            if pending:
+                tasks_collection.delete_many(
+                    {"_id": {"$in": [task["_id"] for task in pending]}},
+                    session=_causal_session(write=True)
+                )
+                for task in pending:
+                    sync_completion_stats(task, None)
+
+            tasks_collection.update_many(
+                {"series_id": deleted["_id"], "user_id": user_id},
+                {"$unset": {"series_id": "", "occurrence_date": ""}},
+                session=_causal_session(write=True)
+            )
+
+        # Una tarea eliminada deja de contar en los resúmenes diarios
+        sync_completion_stats(deleted, None)
+        return True
         
     except Exception as e:
         print(f"Error al eliminar tarea: {e}")
@@ -277,7 +886,7 @@ def add_category(name, user_id):
             user_id = ObjectId(user_id)
         
         # Verificar si la categoría ya existe para este usuario
-        if categories_collection.find_one({"name": name, "user_id": user_id}):
+        if categories_collection.find_one({"name": name, "user_id": user_id}, session=_causal_session()):
             return False, "La categoría ya existe"
         
         category_data = {
@@ -286,7 +895,7 @@ def add_category(name, user_id):
             "created_at": datetime.now()
         }
         
-        result = categories_collection.insert_one(category_data)
+        result = categories_collection.insert_one(category_data, session=_causal_session(write=True))
         return True, str(result.inserted_id)
         
     except Exception as e:
@@ -302,18 +911,22 @@ def delete_category(category_id, user_id):
             user_id = ObjectId(user_id)
         
         # Verificar que la categoría pertenece al usuario
-        category = categories_collection.find_one({"_id": category_id, "user_id": user_id})
+        category = categories_collection.find_one({"_id": category_id, "user_id": user_id}, session=_causal_session())
         if not category:
             return False
         
         # Actualizar todas las tareas que usan esta categoría
         tasks_collection.update_many(
             {"category_id": category_id, "user_id": user_id},
-            {"$set": {"category_id": None}}
+            {"$set": {"category_id": None}},
+            session=_causal_session(write=True)
         )
         
+        # Mover los resúmenes diarios de la categoría a "sin categoría"
+        merge_category_stats(category_id, user_id)
+        
         # Eliminar la categoría
-        result = categories_collection.delete_one({"_id": category_id, "user_id": user_id})
+        result = categories_collection.delete_one({"_id": category_id, "user_id": user_id}, session=_causal_session(write=True))
         return result.deleted_count > 0
         
     except Exception as e:
@@ -327,14 +940,14 @@ def get_task_statistics(user_id):
             user_id = ObjectId(user_id)
         
         pipeline = [
-            {"$match": {"user_id": user_id}},
+            {"$match": {"user_id": user_id, "recurrence": {"$exists": False}}},
             {"$group": {
                 "_id": "$status",
                 "count": {"$sum": 1}
             }}
         ]
         
-        stats = list(tasks_collection.aggregate(pipeline))
+        stats = list(dashboard_tasks_collection.aggregate(pipeline, session=_causal_session()))
         
         # Procesar estadísticas
         result = {
@@ -355,30 +968,225 @@ def get_task_statistics(user_id):
         print(f"Error al obtener estadísticas: {e}")
         return {"total": 0, "no iniciado": 0, "en proceso": 0, "finalizado": 0, "en problemas": 0}
 
+def _completion_key(task):
+    """Clave (usuario, categoría, día) del resumen al que aporta una tarea finalizada"""
+    if not task or task.get("status") != "finalizado" or not task.get("completed_at"):
+        return None
+    completed_at = task["completed_at"]
+    day = datetime(completed_at.year, completed_at.month, completed_at.day)
+    return task["user_id"], task.get("category_id"), day
+
+def _increment_completion_stats(key, amount):
+    """Sumar (o restar) tareas finalizadas en el resumen diario indicado"""
+    user_id, category_id, day = key
+    task_stats_collection.update_one(
+        {"user_id": user_id, "category_id": category_id, "day": day},
+        {"$inc": {"completed": amount}},
+        upsert=True,
+        session=_causal_session(write=True)
+    )
+
+def sync_completion_stats(previous, current):
+    """Actualizar los resúmenes diarios cuando una tarea entra o sale de 'finalizado'"""
+    try:
+        previous_key = _completion_key(previous)
+        current_key = _completion_key(current)
+        
+        if previous_key == current_key:
+            return
+        if previous_key:
+            _increment_completion_stats(previous_key, -1)
+        if current_key:
+            _increment_completion_stats(current_key, 1)
+            
+    except Exception as e:
+        print(f"Error al actualizar resúmenes diarios: {e}")
+
+def merge_category_stats(category_id, user_id):
+    """Trasladar los resúmenes de una categoría eliminada a 'sin categoría'"""
+    try:
+        if isinstance(category_id, str):
+            category_id = ObjectId(category_id)
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        
+        query = {"user_id": user_id, "category_id": category_id}
+        for rollup in task_stats_collection.find(query, session=_causal_session()):
+            _increment_completion_stats((user_id, None, rollup["day"]), rollup["completed"])
+        
+        task_stats_collection.delete_many(query, session=_causal_session(write=True))
+        
+    except Exception as e:
+        print(f"Error al mover resúmenes de categoría: {e}")
+
+def get_completion_timeseries(user_id, days=30, granularity="day", category_filter=None, by_category=False):
+    """Obtener tareas finalizadas por día o semana a partir de los resúmenes diarios"""
+    try:
+        if isinstance(user_id, str):
+            user_id = ObjectId(user_id)
+        
+        today = datetime.now()
+        end_day = datetime(today.year, today.month, today.day)
+        start_day = end_day - timedelta(days=days - 1)
+        
+        query = {"user_id": user_id, "day": {"$gte": start_day, "$lte": end_day}}
+        if category_filter:
+            query["category_id"] = ObjectId(category_filter)
+        
+        # Formato del periodo: fecha para días, año-semana ISO para semanas
+        period_format = "%G-W%V" if granularity == "week" else "%Y-%m-%d"
+        group_id = {"period": {"$dateToString": {"format": period_format, "date": "$day"}}}
+        if by_category:
+            group_id["category_id"] = "$category_id"
+        
+        pipeline = [
+            {"$match": query},
+            {"$group": {"_id": group_id, "completed": {"$sum": "$completed"}}}
+        ]
+        
+        rows = list(dashboard_task_stats_collection.aggregate(pipeline, session=_causal_session()))
+        
+        # Lista de periodos del rango (O(días), independiente del número de tareas)
+        periods = []
+        for offset in range(days):
+            period = (start_day + timedelta(days=offset)).strftime(period_format)
+            if not periods or periods[-1] != period:
+                periods.append(period)
+        
+        def build_series(counts):
+            return [{"period": period, "completed": counts.get(period, 0)} for period in periods]
+        
+        totals = {}
+        for row in rows:
+            period = row["_id"]["period"]
+            totals[period] = totals.get(period, 0) + row["completed"]
+        
+        result = {
+            "granularity": granularity,
+            "start": start_day.strftime('%Y-%m-%d'),
+            "end": end_day.strftime('%Y-%m-%d'),
+            "total": sum(totals.values()),
+            "series": build_series(totals)
+        }
+        
+        if by_category:
+            names = {category['_id']: category['name'] for category in get_user_categories(user_id)}
+            per_category = {}
+            for row in rows:
+                counts = per_category.setdefault(row["_id"].get("category_id"), {})
+                counts[row["_id"]["period"]] = counts.get(row["_id"]["period"], 0) + row["completed"]
+            
+            result["categories"] = [
+                {
+                    "category_id": str(category_id) if category_id else None,
+                    "category_name": names.get(category_id, "Sin categoría") if category_id else "Sin categoría",
+                    "total": sum(counts.values()),
+                    "series": build_series(counts)
+                }
+                for category_id, counts in per_category.items()
+            ]
+        
+        return result
+        
+    except Exception as e:
+        print(f"Error al obtener serie de productividad: {e}")
+        return None
+
+def backfill_task_stats(user_id=None):
+    """Reconstruir los resúmenes diarios a partir de las tareas finalizadas existentes.
+    
+    Los resúmenes se calculan en una colección auxiliar que después sustituye a
+    task_stats_daily con un renombrado atómico: el dashboard ve los resúmenes
+    anteriores o los nuevos, nunca una colección vacía o a medias. Con user_id
+    solo se recalculan los de ese usuario y el resto se copia tal cual.
+    
+    Es una tarea de mantenimiento: debe ejecutarse con la aplicación detenida,
+    porque las tareas que se finalicen durante la reconstrucción se perderían
+    al sustituir la colección.
+    """
+    try:
+        match = {"status": "finalizado", "completed_at": {"$ne": None}}
+        if user_id:
+            if isinstance(user_id, str):
+                user_id = ObjectId(user_id)
+            match["user_id"] = user_id
+        
+        staging = db[f"{task_stats_collection.name}_backfill"]
+        staging.drop()
+        
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "user_id": "$user_id",
+                    "category_id": "$category_id",
+                    "day": {"$dateFromParts": {
+                        "year": {"$year": "$completed_at"},
+                        "month": {"$month": "$completed_at"},
+                        "day": {"$dayOfMonth": "$completed_at"}
+                    }}
+                },
+                "completed": {"$sum": 1}
+            }},
+            {"$project": {
+                "_id": 0,
+                "user_id": "$_id.user_id",
+                "category_id": {"$ifNull": ["$_id.category_id", None]},
+                "day": "$_id.day",
+                "completed": 1
+            }}
+        ]
+        if user_id:
+            # Los resúmenes de los demás usuarios pasan sin cambios
+            pipeline.append({"$unionWith": {
+                "coll": task_stats_collection.name,
+                "pipeline": [{"$match": {"user_id": {"$ne": user_id}}}]
+            }})
+        pipeline.append({"$out": staging.name})
+        
+        tasks_collection.aggregate(pipeline, allowDiskUse=True)
+        
+        staging.create_index([("user_id", 1), ("day", 1), ("category_id", 1)], unique=True)
+        written = staging.count_documents({"user_id": user_id} if user_id else {})
+        staging.rename(task_stats_collection.name, dropTarget=True)
+        
+        return True, written
+        
+    except Exception as e:
+        return False, f"Error al reconstruir resúmenes: {str(e)}"
+
 def get_upcoming_tasks(user_id, days=7):
     """Obtener tareas próximas a vencer"""
     try:
         if isinstance(user_id, str):
             user_id = ObjectId(user_id)
         
-        future_date = datetime.now() + timedelta(days=days)
+        now = datetime.now()
+        future_date = now + timedelta(days=days)
         
         query = {
             "user_id": user_id,
             "status": {"$ne": "finalizado"},
+            "recurrence": {"$exists": False},
             "end_date": {
-                "$gte": datetime.now(),
+                "$gte": now,
                 "$lte": future_date
             }
         }
         
-        tasks = list(tasks_collection.find(query).sort("end_date", 1))
+        # Ids y fechas se formatean en la propia agregación
+        pipeline = [{"$match": query}, {"$sort": {"end_date": 1}}] + _task_list_stages(include_description=True)
+        tasks = list(dashboard_tasks_collection.aggregate(pipeline, session=_causal_session()))
         
-        # Procesar resultados
-        for task in tasks:
-            task['id'] = str(task['_id'])
-            if task.get('end_date'):
-                task['end_date'] = task['end_date'].strftime('%Y-%m-%d')
+        # Ocurrencias de series recurrentes que vencen en la ventana
+        today = datetime(now.year, now.month, now.day)
+        occurrences = get_series_occurrences(
+            user_id, {"user_id": user_id, "recurrence": {"$exists": True}},
+            today, future_date, date_field="end_date"
+        )
+        if occurrences:
+            tasks.extend(_lean_occurrence(occurrence, include_description=True) for occurrence in occurrences)
+            tasks.sort(key=lambda task: task.get('end_date') or task.get('start_date'))
         
         return tasks
         
@@ -0,0 +1,234 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from accounts import hash_password, validate_birth_date, validate_email, validate_password
+from database import (
+    init_db, find_existing_users, insert_provisioned_users, ensure_default_categories,
+    create_provisioning_job, get_provisioning_job, claim_provisioning_job,
+    record_provisioning_progress, finish_provisioning_job
+)
+
+# Usuarios por lote: una consulta de duplicados y un insert_many por lote
+BATCH_SIZE = 500
+
+# Archivos subidos por la API mientras se procesan
+IMPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imports')
+
+FILE_FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+def detect_format(filename):
+    """Deducir el formato (csv o ndjson) a partir de la extensión del archivo"""
+    return FILE_FORMATS.get(os.path.splitext(filename)[1].lower())
+
+def read_user_records(path, file_format):
+    """Leer el archivo de usuarios y devolver pares (línea, registro o mensaje de error)"""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if file_format == 'csv':
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield line_number, "JSON inválido"
+                    continue
+                yield line_number, record if isinstance(record, dict) else "Se esperaba un objeto JSON"
+
+def _validate_record(record):
+    """Normalizar y validar un registro con las mismas reglas que el registro web"""
+    email = str(record.get('email') or '').strip().lower()
+    username = str(record.get('username') or '').strip()
+    password = str(record.get('password') or '')
+    birth_date = str(record.get('birth_date') or '').strip()
+
+    if not all([email, username, password]):
+        return None, 'Faltan campos obligatorios (email, username, password)'
+    if not validate_email(email):
+        return None, 'Email inválido'
+    if not validate_password(password):
+        return None, 'La contraseña debe tener al menos 6 caracteres'
+    if len(username) < 3:
+        return None, 'El nombre de usuario debe tener al menos 3 caracteres'
+    if birth_date:
+        error = validate_birth_date(birth_date)
+        if error:
+            return None, error
+
+    return (email, username, password, birth_date), None
+
+def _provision_batch(batch, batch_offset, job_id, pool, workers):
+    """Procesar un lote: validar, descartar duplicados, calcular hashes e insertar"""
+    created = skipped = 0
+    errors = []
+
+    valid = []
+    seen_emails, seen_usernames = set(), set()
+    for line_number, record in batch:
+        if isinstance(record, str):
+            errors.append({"line": line_number, "email": None, "error": record})
+            continue
+
+        user, error = _validate_record(record)
+        if error:
+            errors.append({"line": line_number, "email": record.get('email'), "error": error})
+            continue
+
+        email, username = user[0], user[1]
+        if email in seen_emails or username in seen_usernames:
+            errors.append({"line": line_number, "email": email, "error": "Duplicado dentro del archivo"})
+            continue
+        seen_emails.add(email)
+        seen_usernames.add(username)
+        valid.append((line_number, user))
+
+    # Una única consulta contra los índices únicos de email y username
+    existing = find_existing_users(seen_emails, seen_usernames)
+    by_email = {user["email"]: user for user in existing}
+    by_username = {user["username"]: user for user in existing}
+
+    pending = []
+    resumed_ids = []
+    for line_number, user in valid:
+        email, username = user[0], user[1]
+        owner = by_email.get(email) or by_username.get(username)
+        if not owner:
+            pending.append((line_number, user))
+        elif (owner.get("provisioning_job_id") == job_id
+              and owner.get("provisioning_offset") == batch_offset
+              and owner["email"] == email and owner["username"] == username):
+            # Insertado por este mismo lote antes de una interrupción
+            resumed_ids.append(owner["_id"])
+            created += 1
+        else:
+            skipped += 1
+
+    # bcrypt es costoso: los hashes se reparten entre todos los núcleos
+    passwords = [user[2] for _, user in pending]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    hashes = list(pool.map(hash_password, passwords, chunksize=chunksize))
+
+    now = datetime.now()
+    users = [
+        {
+            "email": email,
+            "username": username,
+            "password": password_hash,
+            "birth_date": datetime.strptime(birth_date, '%Y-%m-%d') if birth_date else None,
+            "telegram_chat_id": None,
+            "created_at": now,
+            "last_login": None,
+            "provisioning_job_id": job_id,
+            "provisioning_offset": batch_offset
+        }
+        for (_, (email, username, _, birth_date)), password_hash in zip(pending, hashes)
+    ]
+
+    if users:
+        inserted_ids, insert_errors = insert_provisioned_users(users)
+        created += len(inserted_ids)
+        for index, error in insert_errors.items():
+            line_number, user = pending[index]
+            errors.append({"line": line_number, "email": user[0], "error": error})
+
+    ensure_default_categories(resumed_ids)
+
+    return {"created": created, "skipped": skipped, "failed": len(errors), "errors": errors}
+
+def run_provisioning_job(job_id, force=False, workers=None, progress=None):
+    """Ejecutar (o reanudar) un trabajo de importación masiva de usuarios.
+
+    El avance se guarda después de cada lote, así que si el proceso se
+    interrumpe basta con volver a ejecutarlo: se salta lo ya confirmado y los
+    usuarios del lote a medias se reconocen por su provisioning_job_id y
+    provisioning_offset (posición del lote en el archivo).
+    """
+    job = claim_provisioning_job(job_id, force)
+    if not job:
+        return False, "El trabajo no existe, ya terminó o se está ejecutando"
+
+    workers = workers or os.cpu_count() or 1
+
+    try:
+        processed = job["processed"]
+        records = itertools.islice(read_user_records(job["source_path"], job["format"]), processed, None)
+
+        # 'spawn': el proceso padre tiene abierto el cliente de MongoDB (y, desde la
+        # API, otros hilos), que no es seguro duplicar con fork
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            while True:
+                batch = list(itertools.islice(records, BATCH_SIZE))
+                if not batch:
+                    break
+
+                result = _provision_batch(batch, processed, job["_id"], pool, workers)
+                processed += len(batch)
+                job = record_provisioning_progress(job["_id"], processed, **result)
+                if progress:
+                    progress(job)
+
+        finish_provisioning_job(job["_id"], "completed")
+
+        # Los archivos subidos contienen contraseñas: no se conservan
+        if job.get("delete_source") and os.path.exists(job["source_path"]):
+            os.remove(job["source_path"])
+
+        return True, get_provisioning_job(job["_id"])
+
+    except Exception as e:
+        finish_provisioning_job(job["_id"], "failed", str(e))
+        return False, f"Error en la importación: {str(e)}"
+
+def _print_progress(job):
+    print(f"Procesados: {job['processed']} | creados: {job['created']} | "
+          f"omitidos: {job['skipped']} | con errores: {job['failed']}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Alta masiva de usuarios desde CSV o NDJSON")
+    parser.add_argument('file', nargs='?', help="archivo .csv, .ndjson o .jsonl (email, username, password, birth_date)")
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help="formato del archivo si no se deduce de la extensión")
+    parser.add_argument('--resume', metavar='JOB_ID', help="reanudar un trabajo interrumpido")
+    parser.add_argument('--force', action='store_true', help="reanudar aunque el trabajo figure en ejecución (solo si el proceso anterior murió)")
+    parser.add_argument('--workers', type=int, help="procesos para calcular hashes (por defecto, uno por núcleo)")
+    args = parser.parse_args()
+
+    # Validar todos los argumentos antes de crear el trabajo
+    if not args.file and not args.resume:
+        parser.error("Indica un archivo o --resume JOB_ID")
+    if args.file and args.resume:
+        parser.error("Indica un archivo o --resume JOB_ID, no ambos")
+    if args.force and not args.resume:
+        parser.error("--force solo se admite junto con --resume")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers debe ser al menos 1")
+    if args.file:
+        file_format = args.format or detect_format(args.file)
+        if not file_format:
+            parser.error("No se pudo deducir el formato; usa --format")
+        if not os.path.isfile(args.file):
+            parser.error(f"No existe el archivo {args.file}")
+
+    init_db()
+
+    if args.resume:
+        job_id = args.resume
+    else:
+        job_id = create_provisioning_job(os.path.abspath(args.file), file_format)
+        print(f"Trabajo de importación: {job_id}")
+
+    success, result = run_provisioning_job(job_id, force=args.force, workers=args.workers, progress=_print_progress)
+    if not success:
+        print(result)
+        print(f"Para reanudar: python provisioning.py --resume {job_id}")
+        sys.exit(1)
+    print("Importación completada")
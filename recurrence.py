@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+
+# Subconjunto soportado de RRULE (RFC 5545)
+FREQUENCIES = ['daily', 'weekly', 'monthly']
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+MAX_COUNT = 1000
+MAX_INTERVAL = 365
+
+def _to_day(date_obj):
+    """Truncar una fecha a medianoche"""
+    return datetime(date_obj.year, date_obj.month, date_obj.day)
+
+def parse_recurrence(rule, start, until=None):
+    """Convertir una regla de recurrencia en el diccionario que se guarda en la tarea.
+
+    Acepta un preset ('daily', 'weekly', 'monthly') o un RRULE con las partes
+    FREQ, INTERVAL, BYDAY, UNTIL y COUNT, por ejemplo
+    'FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;COUNT=10'. Lanza ValueError si la
+    regla no es válida. COUNT se convierte en una fecha UNTIL para que la
+    expansión no tenga que recorrer la serie desde el principio.
+    """
+    start = _to_day(start)
+    rule = (rule or '').strip()
+    if rule.upper().startswith('RRULE:'):
+        rule = rule[len('RRULE:'):]
+
+    parts = {}
+    if rule.lower() in FREQUENCIES:
+        parts['FREQ'] = rule.upper()
+    else:
+        for part in rule.split(';'):
+            if not part:
+                continue
+            if '=' not in part:
+                raise ValueError(f"Parte de regla inválida: {part}")
+            key, value = part.split('=', 1)
+            parts[key.strip().upper()] = value.strip().upper()
+
+    unknown = set(parts) - {'FREQ', 'INTERVAL', 'BYDAY', 'UNTIL', 'COUNT'}
+    if unknown:
+        raise ValueError(f"Partes de regla no soportadas: {', '.join(sorted(unknown))}")
+
+    freq = parts.get('FREQ', '').lower()
+    if freq not in FREQUENCIES:
+        raise ValueError("La frecuencia debe ser diaria, semanal o mensual")
+
+    try:
+        interval = int(parts.get('INTERVAL', 1))
+    except ValueError:
+        raise ValueError("El intervalo debe ser un número entero")
+    if interval < 1 or interval > MAX_INTERVAL:
+        raise ValueError(f"El intervalo debe estar entre 1 y {MAX_INTERVAL}")
+
+    byweekday = [start.weekday()]
+    if 'BYDAY' in parts:
+        if freq != 'weekly':
+            raise ValueError("BYDAY solo se admite con frecuencia semanal")
+        try:
+            byweekday = sorted({WEEKDAYS.index(day.strip()) for day in parts['BYDAY'].split(',')})
+        except ValueError:
+            raise ValueError("Días de la semana inválidos en BYDAY")
+
+    if 'UNTIL' in parts:
+        if until:
+            raise ValueError("La fecha de fin se indicó dos veces")
+        try:
+            until = datetime.strptime(parts['UNTIL'][:8], '%Y%m%d')
+        except ValueError:
+            raise ValueError("Formato de UNTIL inválido (AAAAMMDD)")
+    if until:
+        until = _to_day(until)
+        if until < start:
+            raise ValueError("La fecha de fin de la repetición es anterior al inicio")
+
+    recurrence = {
+        "freq": freq,
+        "interval": interval,
+        "byweekday": byweekday if freq == 'weekly' else None,
+        "until": until
+    }
+
+    if 'COUNT' in parts:
+        if until:
+            raise ValueError("COUNT y UNTIL no pueden usarse a la vez")
+        try:
+            count = int(parts['COUNT'])
+        except ValueError:
+            raise ValueError("COUNT debe ser un número entero")
+        if count < 1 or count > MAX_COUNT:
+            raise ValueError(f"COUNT debe estar entre 1 y {MAX_COUNT}")
+
+        last = None
+        found = 0
+        horizon = start + timedelta(days=MAX_COUNT * MAX_INTERVAL // 10)
+        for occurrence in expand_occurrences(recurrence, start, start, horizon):
+            last = occurrence
+            found += 1
+            if found >= count:
+                break
+        if found < count:
+            raise ValueError(f"Las {count} repeticiones superan el límite de {horizon.year - start.year} años; usa UNTIL")
+        recurrence["until"] = last
+
+    return recurrence
+
+def _add_months(date_obj, months):
+    """Sumar meses; devuelve None si el día no existe en el mes resultante"""
+    month_index = date_obj.month - 1 + months
+    year = date_obj.year + month_index // 12
+    try:
+        return date_obj.replace(year=year, month=month_index % 12 + 1)
+    except ValueError:
+        return None
+
+def expand_occurrences(recurrence, start, window_start, window_end):
+    """Generar las fechas de la serie dentro de [window_start, window_end].
+
+    El primer periodo se calcula aritméticamente, así que el coste depende del
+    tamaño de la ventana y no de cuántas ocurrencias hubo antes de ella.
+    """
+    start = _to_day(start)
+    window_start = max(_to_day(window_start), start)
+    window_end = _to_day(window_end)
+    if recurrence.get("until"):
+        window_end = min(window_end, _to_day(recurrence["until"]))
+    if window_start > window_end:
+        return
+
+    freq = recurrence["freq"]
+    interval = recurrence.get("interval") or 1
+
+    if freq == 'daily':
+        skipped = -(-(window_start - start).days // interval)
+        current = start + timedelta(days=skipped * interval)
+        while current <= window_end:
+            yield current
+            current += timedelta(days=interval)
+
+    elif freq == 'weekly':
+        byweekday = recurrence.get("byweekday") or [start.weekday()]
+        anchor = start - timedelta(days=start.weekday())
+        weeks = (window_start - anchor).days // 7
+        week = anchor + timedelta(weeks=weeks - weeks % interval)
+        while week <= window_end:
+            for weekday in byweekday:
+                current = week + timedelta(days=weekday)
+                if window_start <= current <= window_end:
+                    yield current
+            week += timedelta(weeks=interval)
+
+    elif freq == 'monthly':
+        months = (window_start.year - start.year) * 12 + window_start.month - start.month
+        months -= months % interval
+        while _add_months(start.replace(day=1), months) <= window_end:
+            current = _add_months(start, months)
+            months += interval
+            # Si el mes no tiene ese día (p. ej. 31) se omite, como en RRULE
+            if current and current >= window_start:
+                yield current
+
+def describe_recurrence(recurrence):
+    """Texto corto en español para mostrar la recurrencia en la interfaz"""
+    if not recurrence:
+        return None
+    interval = recurrence.get("interval") or 1
+    units = {'daily': ('Cada día', 'días'), 'weekly': ('Cada semana', 'semanas'), 'monthly': ('Cada mes', 'meses')}
+    single, plural = units[recurrence["freq"]]
+    text = single if interval == 1 else f"Cada {interval} {plural}"
+    if recurrence.get("until"):
+        text += f" hasta {recurrence['until'].strftime('%d/%m/%Y')}"
+    return text
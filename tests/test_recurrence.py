@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pytest
+
+from recurrence import MAX_COUNT, MAX_INTERVAL, expand_occurrences, parse_recurrence
+
+def _days(dates):
+    return [date.strftime('%Y-%m-%d') for date in dates]
+
+def test_weekly_interval_is_anchored_on_series_start():
+    # Serie quincenal que empieza el lunes 19/10/2026: la semana del 26/10 no toca
+    recurrence = parse_recurrence('FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE', datetime(2026, 10, 19))
+
+    occurrences = expand_occurrences(recurrence, datetime(2026, 10, 19), datetime(2026, 10, 24), datetime(2026, 11, 20))
+
+    assert _days(occurrences) == ['2026-11-02', '2026-11-04', '2026-11-16', '2026-11-18']
+
+def test_weekly_window_far_from_start_keeps_the_same_weeks():
+    recurrence = parse_recurrence('FREQ=WEEKLY;INTERVAL=3;BYDAY=FR', datetime(2026, 1, 2))
+
+    occurrences = list(expand_occurrences(recurrence, datetime(2026, 1, 2), datetime(2026, 10, 1), datetime(2026, 10, 31)))
+
+    # 2 de enero + 39 y 42 semanas
+    assert _days(occurrences) == ['2026-10-02', '2026-10-23']
+    assert all((date - datetime(2026, 1, 2)).days % 21 == 0 for date in occurrences)
+
+def test_monthly_on_day_31_skips_shorter_months():
+    recurrence = parse_recurrence('monthly', datetime(2026, 1, 31))
+
+    occurrences = expand_occurrences(recurrence, datetime(2026, 1, 31), datetime(2026, 1, 1), datetime(2026, 8, 31))
+
+    assert _days(occurrences) == ['2026-01-31', '2026-03-31', '2026-05-31', '2026-07-31', '2026-08-31']
+
+def test_count_becomes_until_of_last_occurrence():
+    recurrence = parse_recurrence('FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;COUNT=5', datetime(2026, 10, 19))
+
+    assert recurrence["until"] == datetime(2026, 11, 16)
+    occurrences = expand_occurrences(recurrence, datetime(2026, 10, 19), datetime(2026, 10, 19), datetime(2027, 12, 31))
+    assert _days(occurrences) == ['2026-10-19', '2026-10-21', '2026-11-02', '2026-11-04', '2026-11-16']
+
+def test_count_skips_missing_days_when_computing_until():
+    # 31/01 + 3 ocurrencias: enero, marzo y mayo (febrero y abril no tienen día 31)
+    recurrence = parse_recurrence('FREQ=MONTHLY;COUNT=3', datetime(2026, 1, 31))
+
+    assert recurrence["until"] == datetime(2026, 5, 31)
+
+def test_count_beyond_expansion_horizon_is_rejected():
+    # Solo caben 4 repeticiones cada 365 meses dentro del horizonte de expansión
+    with pytest.raises(ValueError):
+        parse_recurrence(f'FREQ=MONTHLY;INTERVAL={MAX_INTERVAL};COUNT={MAX_COUNT}', datetime(2026, 4, 1))
+
+def test_count_up_to_expansion_horizon_is_accepted():
+    recurrence = parse_recurrence(f'FREQ=MONTHLY;INTERVAL={MAX_INTERVAL};COUNT=4', datetime(2026, 4, 1))
+
+    # abril de 2026 + 3 x 365 meses
+    assert recurrence["until"] == datetime(2117, 7, 1)
+
+def test_count_and_until_are_exclusive():
+    with pytest.raises(ValueError):
+        parse_recurrence('FREQ=DAILY;COUNT=3;UNTIL=20261231', datetime(2026, 10, 19))
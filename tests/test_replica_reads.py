@@ -0,0 +1,54 @@
+import os
+import uuid
+
+import pytest
+
+# Comprobación contra un replica set real, p. ej.
+# MONGODB_URI='mongodb://localhost:27017/?replicaSet=rs0' python -m pytest tests/test_replica_reads.py
+if 'replicaSet=' not in os.getenv('MONGODB_URI', ''):
+    pytest.skip("MONGODB_URI no apunta a un replica set", allow_module_level=True)
+
+# Forzar las lecturas del dashboard a un secundario antes de importar la base de datos
+os.environ['MONGODB_DASHBOARD_READ_PREFERENCE'] = 'secondary'
+
+from database import (
+    add_task, begin_causal_session, end_causal_session, get_user_tasks, register_user,
+    users_collection, tasks_collection, categories_collection
+)
+
+@pytest.fixture
+def user_id():
+    suffix = uuid.uuid4().hex[:12]
+    success, _ = register_user(f"replica-{suffix}@example.com", f"replica-{suffix}", "secreto1", "")
+    assert success
+    user = users_collection.find_one({"username": f"replica-{suffix}"})
+    yield str(user["_id"])
+    tasks_collection.delete_many({"user_id": user["_id"]})
+    categories_collection.delete_many({"user_id": user["_id"]})
+    users_collection.delete_one({"_id": user["_id"]})
+
+def test_secondary_read_sees_previous_write(user_id):
+    # Primera petición: crea la tarea y devuelve el token causal que se guarda en la cookie
+    begin_causal_session(None)
+    success, task_id = add_task("Tarea de réplica", "", None, user_id, None)
+    token = end_causal_session()
+    assert success
+    assert token is not None
+
+    # Segunda petición: la lectura en el secundario espera hasta ver la escritura
+    begin_causal_session(token)
+    try:
+        tasks = get_user_tasks(user_id)
+    finally:
+        end_causal_session()
+
+    assert task_id in [task["id"] for task in tasks]
+
+def test_read_only_request_keeps_token(user_id):
+    begin_causal_session(None)
+    add_task("Tarea de réplica", "", None, user_id, None)
+    token = end_causal_session()
+
+    begin_causal_session(token)
+    get_user_tasks(user_id)
+    assert end_causal_session() == token